@@ -54,6 +54,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
+    'cards.middleware.QueryInstrumentationMiddleware',
 ]
 
 INTERNAL_IPS = [
@@ -84,10 +85,46 @@ WSGI_APPLICATION = 'bonus.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
 
-DATABASES = {
+DATABASE_ENGINE = os.getenv("DJANGO_BONUS_CARDS_DB_ENGINE", "sqlite")
+
+if DATABASE_ENGINE == "postgresql":
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv("DJANGO_BONUS_CARDS_DB_NAME", "bonus_cards"),
+            'USER': os.getenv("DJANGO_BONUS_CARDS_DB_USER", ""),
+            'PASSWORD': os.getenv("DJANGO_BONUS_CARDS_DB_PASSWORD", ""),
+            'HOST': os.getenv("DJANGO_BONUS_CARDS_DB_HOST", ""),
+            'PORT': os.getenv("DJANGO_BONUS_CARDS_DB_PORT", ""),
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv(
+                "DJANGO_BONUS_CARDS_DB_NAME", BASE_DIR / 'db.sqlite3'
+            ),
+            'OPTIONS': {
+                # seconds to wait for a write lock before "database is locked"
+                'timeout': int(os.getenv("DJANGO_BONUS_CARDS_DB_TIMEOUT", 20)),
+            },
+        }
+    }
+
+DATABASES['default'].update({
+    'CONN_MAX_AGE': int(os.getenv("DJANGO_BONUS_CARDS_CONN_MAX_AGE", 60)),
+    'CONN_HEALTH_CHECKS': True,
+})
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'bonus-cards',
     }
 }
 
@@ -142,12 +179,59 @@ LOGGING = {
         },
     },
     "loggers": {
-        "django.db.backends": {
-            "level": "DEBUG",
+        "cards": {
+            "level": "INFO",
             "handlers": ["console"],
-        }
+        },
     }
 }
 
 # project related settings
 CARDS_PER_PAGE_NUMBER = 20
+CARDS_GENERATION_BATCH_SIZE = 1000
+CARDS_SWEEP_BATCH_SIZE = 5000
+CARDS_RECONCILE_CHUNK_SIZE = 5000
+CARDS_INGEST_BATCH_SIZE = 1000
+# bearer token of transactions/batch/ clients, the endpoint is disabled
+# without it
+CARDS_INGEST_TOKEN = os.getenv("DJANGO_BONUS_CARDS_INGEST_TOKEN")
+CARDS_COUNT_CACHE_TIMEOUT = 60
+CARDS_QUERY_BUDGETS = {
+    "cards:index": 1,
+    "cards:card_series_list": 1,
+    "cards:card_list": 3,
+    "cards:card_detail": 2,
+    "cards:view_card_transaction": 5,
+    "cards:card_search": 2,
+    "cards:transaction_analytics": 2,
+    "cards:card_balance": 1,
+    "cards:async_card_balance": 1,
+    "cards:async_card_detail": 1,
+    "cards:async_card_transactions": 3,
+}
+CARDS_QUERY_BUDGET_STRICT = False
+CARDS_EXPORT_CHUNK_SIZE = 2000
+CARDS_IMPORT_CHUNK_SIZE = 5000
+CARDS_BULK_CHUNK_SIZE = 5000
+CARDS_CACHE_TIMEOUT = 300
+CARDS_ROLLUP_CHUNK_SIZE = 5000
+CARDS_ARCHIVE_AFTER_DAYS = 365
+CARDS_ARCHIVE_CHUNK_SIZE = 5000
+CARDS_SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv(
+        "DJANGO_BONUS_CARDS_SQLITE_JOURNAL_MODE", "WAL"
+    ),
+    "synchronous": os.getenv(
+        "DJANGO_BONUS_CARDS_SQLITE_SYNCHRONOUS", "NORMAL"
+    ),
+    "mmap_size": int(
+        os.getenv("DJANGO_BONUS_CARDS_SQLITE_MMAP_SIZE", 256 * 1024 * 1024)
+    ),
+}
+CARDS_SQLITE_IMMEDIATE_TRANSACTIONS = (
+    os.getenv("DJANGO_BONUS_CARDS_SQLITE_IMMEDIATE", "True") == "True"
+)
+CARDS_SLOW_QUERY_MS = float(os.getenv("DJANGO_BONUS_CARDS_SLOW_QUERY_MS", 100))
+CARDS_QUERY_LOG_SAMPLE_RATE = float(
+    os.getenv("DJANGO_BONUS_CARDS_QUERY_LOG_SAMPLE_RATE", 0)
+)
@@ -1,6 +1,10 @@
 from django.contrib import admin
+from django.utils import timezone
 
-from .models import Card, CardSeries, Transaction
+from .bulk import bulk_delete, bulk_set_active, purge_series
+from .codec import decode
+from .models import (ArchivedTransaction, Card, CardSeries, GenerationJob,
+                     SeriesStats, Transaction, TransactionRollup)
 
 
 class CardSeriesAdmin(admin.ModelAdmin):
@@ -19,8 +23,36 @@ class CardSeriesAdmin(admin.ModelAdmin):
     search_fields = (
         "description",
     )
+    readonly_fields = (
+        "next_number",
+    )
     empty_value_display = "--empty--"
 
+    list_select_related = (
+        "stats",
+    )
+    actions = (
+        "purge_expired_series",
+    )
+
+    @admin.display(description="cards_count", ordering="stats__cards_count")
+    def cards_count(self, obj):
+        try:
+            return obj.stats.cards_count
+        except SeriesStats.DoesNotExist:
+            return None
+
+    @admin.action(description="Purge selected expired series in chunks")
+    def purge_expired_series(self, request, queryset):
+        expired = queryset.filter(valid_until__lte=timezone.now())
+        stats = purge_series(expired.values_list("pk", flat=True))
+        self.message_user(
+            request,
+            f"{stats.series_deleted} series purged with "
+            f"{stats.cards_affected} cards and "
+            f"{stats.transactions_deleted} transactions",
+        )
+
 
 class CardAdmin(admin.ModelAdmin):
     list_display = (
@@ -42,9 +74,41 @@ class CardAdmin(admin.ModelAdmin):
         "series__description",
     )
     list_filter = (
+        "status",
         "series__issue_date",
     )
     empty_value_display = "--empty--"
+    actions = (
+        "activate_cards",
+        "deactivate_cards",
+        "delete_cards",
+    )
+
+    @admin.action(description="Activate selected cards")
+    def activate_cards(self, request, queryset):
+        stats = bulk_set_active(queryset, is_active=True)
+        self.message_user(request, f"{stats.cards_affected} cards activated")
+
+    @admin.action(description="Deactivate selected cards")
+    def deactivate_cards(self, request, queryset):
+        stats = bulk_set_active(queryset, is_active=False)
+        self.message_user(
+            request, f"{stats.cards_affected} cards deactivated"
+        )
+
+    @admin.action(description="Delete selected cards in chunks")
+    def delete_cards(self, request, queryset):
+        stats = bulk_delete(queryset)
+        self.message_user(request, f"{stats.cards_affected} cards deleted")
+
+    def get_search_results(self, request, queryset, search_term):
+        try:
+            series, number = decode(search_term)
+        except ValueError:
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        return queryset.filter(series_id=series, number=number), False
 
 
 class TransactionAdmin(admin.ModelAdmin):
@@ -57,6 +121,89 @@ class TransactionAdmin(admin.ModelAdmin):
     )
 
 
+class ArchivedTransactionAdmin(admin.ModelAdmin):
+    list_display = (
+        "pk",
+        "card",
+        "date_time",
+        "amount",
+        "description",
+        "archived_date",
+    )
+    readonly_fields = (
+        "id",
+        "card",
+        "date_time",
+        "amount",
+        "description",
+        "archived_date",
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+
+class SeriesStatsAdmin(admin.ModelAdmin):
+    list_display = (
+        "series",
+        "cards_count",
+        "active_count",
+        "outdated_count",
+        "total_balance",
+        "transactions_count",
+        "transactions_volume",
+        "updated_date",
+    )
+    readonly_fields = (
+        "cards_count",
+        "active_count",
+        "outdated_count",
+        "total_balance",
+        "transactions_count",
+        "transactions_volume",
+        "updated_date",
+    )
+
+
+class TransactionRollupAdmin(admin.ModelAdmin):
+    list_display = (
+        "pk",
+        "series",
+        "period",
+        "bucket",
+        "transactions_count",
+        "amount_total",
+        "cards_count",
+    )
+    list_filter = (
+        "period",
+    )
+
+
+class GenerationJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "pk",
+        "series",
+        "cards_count",
+        "cards_created",
+        "status",
+        "created_date",
+        "started_date",
+        "finished_date",
+    )
+    list_filter = (
+        "status",
+    )
+    readonly_fields = (
+        "first_number",
+        "cards_created",
+    )
+
+
 admin.site.register(CardSeries, CardSeriesAdmin)
 admin.site.register(Card, CardAdmin)
 admin.site.register(Transaction, TransactionAdmin)
+admin.site.register(ArchivedTransaction, ArchivedTransactionAdmin)
+admin.site.register(SeriesStats, SeriesStatsAdmin)
+admin.site.register(TransactionRollup, TransactionRollupAdmin)
+admin.site.register(GenerationJob, GenerationJobAdmin)
@@ -0,0 +1,95 @@
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .bulk import iter_pk_chunks
+from .models import ArchivedTransaction, Card, Transaction
+
+ARCHIVED_FIELDS = ("pk", "card_id", "amount", "date_time", "description")
+
+
+@dataclass
+class ArchiveStats:
+    transactions_archived: int = 0
+    last_id: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self):
+        if not self.elapsed:
+            return 0.0
+        return self.transactions_archived / self.elapsed
+
+
+def get_archivable_transactions(older_than=None):
+    """
+    Returns transactions dated before `older_than` or of outdated cards.
+
+    `older_than` defaults to CARDS_ARCHIVE_AFTER_DAYS days ago.
+    """
+    if older_than is None:
+        older_than = timezone.now() - timedelta(
+            days=settings.CARDS_ARCHIVE_AFTER_DAYS
+        )
+    return Transaction.objects.filter(
+        Q(date_time__lt=older_than) | Q(card__status=Card.OUTDATED)
+    )
+
+
+def archive_chunk(pks):
+    """
+    Moves transactions with `pks` into ArchivedTransaction table.
+
+    Copy and delete run in one database transaction, so a transaction is
+    always found in exactly one of the tables. Balances, series
+    statistics and rollups count both tables and are not changed.
+    """
+    with transaction.atomic():
+        archived_date = timezone.now()
+        rows = (Transaction.objects
+                           .filter(pk__in=pks)
+                           .values_list(*ARCHIVED_FIELDS))
+        archived = [
+            ArchivedTransaction(
+                id=pk,
+                card_id=card_id,
+                amount=amount,
+                date_time=date_time,
+                description=description,
+                archived_date=archived_date,
+            )
+            for pk, card_id, amount, date_time, description in rows
+        ]
+        ArchivedTransaction.objects.bulk_create(archived, batch_size=1000)
+        Transaction.objects.filter(pk__in=pks).delete()
+    return len(archived)
+
+
+def archive_transactions(older_than=None, chunk_size=None,
+                         progress_callback=None):
+    """
+    Moves archivable transactions into archive chunk by chunk.
+
+    Every chunk is moved in its own database transaction, so an
+    interrupted archival is simply run again.
+    """
+    if chunk_size is None:
+        chunk_size = settings.CARDS_ARCHIVE_CHUNK_SIZE
+
+    stats = ArchiveStats()
+    started = time.perf_counter()
+    for pks in iter_pk_chunks(get_archivable_transactions(older_than),
+                              chunk_size):
+        stats.transactions_archived += archive_chunk(pks)
+        stats.last_id = pks[-1]
+        stats.elapsed = time.perf_counter() - started
+        if progress_callback is not None:
+            progress_callback(stats)
+
+    stats.elapsed = time.perf_counter() - started
+    return stats
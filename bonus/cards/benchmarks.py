@@ -0,0 +1,611 @@
+import asyncio
+import logging
+import random
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from decimal import Decimal
+from functools import partial
+from itertools import combinations
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db import OperationalError, connection, connections, transaction
+from django.db.models import Case, DecimalField, F, Value, When
+from django.test import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .bulk import bulk_set_active, iter_pk_chunks
+from .codec import NUMBER_LIMIT, decode, decode_many, encode, encode_many
+from .forms import CardSearchForm
+from .ledger import post_transaction
+from .middleware import QueryRecorder
+from .models import Card, CardSeries, Transaction
+from .series_stats import apply_series_stats_deltas, get_transaction_deltas
+from .utils import (generate_cards, get_card_by_printable_number,
+                    sweep_outdated_cards)
+
+SEED_BATCH_SIZE = 10000
+SQLITE_DEFAULT_SETTINGS = {
+    "CARDS_SQLITE_PRAGMAS": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "mmap_size": 0,
+    },
+    "CARDS_SQLITE_IMMEDIATE_TRANSACTIONS": False,
+}
+
+
+def percentile(samples, percent):
+    ordered = sorted(samples)
+    index = round(percent / 100 * (len(ordered) - 1))
+    return ordered[index]
+
+
+def measure(func, repeat=5, warmup=1):
+    """
+    Runs `func` `repeat` times and returns latency percentiles in ms.
+
+    Query count is taken from the last run.
+    """
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            func()
+            samples.append((time.perf_counter() - started) * 1000)
+    return {
+        "min_ms": min(samples),
+        "p50_ms": percentile(samples, 50),
+        "p95_ms": percentile(samples, 95),
+        "p99_ms": percentile(samples, 99),
+        "max_ms": max(samples),
+        "queries": len(queries),
+    }
+
+
+def get_full_scans(queryset):
+    """
+    Returns tables read without an index in `queryset` plan.
+    """
+    full_scans = []
+    for line in queryset.explain().splitlines():
+        if connection.vendor == "sqlite":
+            _, _, detail = line.partition("SCAN ")
+            if detail and "USING" not in detail:
+                full_scans.append(detail.split()[0])
+        elif "Seq Scan on " in line:
+            full_scans.append(line.split("Seq Scan on ")[1].split()[0])
+    return full_scans
+
+
+def seed_cards(series_count, cards_per_series, batch_size=SEED_BATCH_SIZE):
+    now = timezone.now()
+    durations = [duration for duration, _ in CardSeries.CARD_DURATION_TYPES]
+    for index in range(series_count):
+        card_series = CardSeries.objects.create(
+            description=f"Benchmark series {index + 1}",
+            issue_date=now - timedelta(days=random.randint(0, 730)),
+            duration=random.choice(durations),
+        )
+        generate_cards(card_series, cards_per_series, batch_size=batch_size)
+
+
+def get_search_field_groups():
+    groups = {}
+    for name in CardSearchForm.base_fields:
+        lookup, _, _ = name.rpartition("__")
+        groups.setdefault(lookup, []).append(name)
+    return groups
+
+
+def get_search_params(lookup):
+    now = timezone.now()
+    if lookup == "series":
+        last_series = CardSeries.objects.order_by("-pk").first()
+        last_series_id = last_series.pk if last_series else 1
+        return {
+            "series__gte": max(last_series_id - 2, 1),
+            "series__lte": last_series_id,
+        }
+    if lookup == "number":
+        return {"number__gte": 100, "number__lte": 200}
+    return {
+        f"{lookup}__gte": now - timedelta(days=30),
+        f"{lookup}__lte": now,
+    }
+
+
+def benchmark_search_combinations(repeat=5):
+    """
+    Explains and times every combination of CardSearchForm filter groups.
+    """
+    lookups = list(get_search_field_groups())
+    results = []
+    for size in range(1, len(lookups) + 1):
+        for combination in combinations(lookups, size):
+            params = {}
+            for lookup in combination:
+                params.update(get_search_params(lookup))
+            queryset = Card.objects.filter(**params).order_by()
+            full_scans = get_full_scans(queryset)
+            results.append({
+                "filters": list(combination),
+                "uses_index": Card._meta.db_table not in full_scans,
+                "full_scans": full_scans,
+                "count": measure(queryset.count, repeat=repeat),
+            })
+    return results
+
+
+def get_sample_printable_numbers(samples):
+    """
+    Returns printable numbers of up to `samples` random existing cards.
+    """
+    last_card = Card.objects.order_by("-pk").first()
+    if last_card is None:
+        return []
+    card_ids = [random.randint(1, last_card.pk) for _ in range(samples)]
+    return encode_many(
+        Card.objects.filter(pk__in=card_ids)
+                    .values_list("series_id", "number")
+    )
+
+
+def benchmark_card_lookup(samples=1000):
+    """
+    Resolves random existing printable numbers one by one.
+    """
+    printable_numbers = get_sample_printable_numbers(samples)
+    if not printable_numbers:
+        return None
+    latencies = []
+    with CaptureQueriesContext(connection) as queries:
+        for printable_number in printable_numbers:
+            started = time.perf_counter()
+            get_card_by_printable_number(printable_number)
+            latencies.append((time.perf_counter() - started) * 1000)
+    return {
+        "lookups": len(latencies),
+        "queries_per_lookup": len(queries) / max(len(latencies), 1),
+        "min_ms": min(latencies),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": max(latencies),
+        "plan": get_card_by_printable_number_plan(printable_numbers[0]),
+    }
+
+
+def get_card_by_printable_number_plan(printable_number):
+    series, number = decode(printable_number)
+    return (Card.objects
+                .select_related("series")
+                .filter(series_id=series, number=number)
+                .explain())
+
+
+def get_benchmark_settings():
+    return {
+        "ALLOWED_HOSTS": [*settings.ALLOWED_HOSTS, "testserver"],
+        # debug toolbar is sync only and would run async views in a thread
+        "MIDDLEWARE": [
+            middleware for middleware in settings.MIDDLEWARE
+            if not middleware.startswith("debug_toolbar.")
+        ],
+    }
+
+
+def get_load_report(latencies, errors, elapsed):
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": max(latencies),
+    }
+
+
+def run_sync_requests(paths):
+    client = Client()
+    latencies = []
+    errors = 0
+    try:
+        for path in paths:
+            started = time.perf_counter()
+            response = client.get(path)
+            latencies.append((time.perf_counter() - started) * 1000)
+            errors += response.status_code != 200
+    finally:
+        connection.close()
+    return latencies, errors
+
+
+def benchmark_sync_requests(paths, concurrency):
+    """
+    Sends GET requests through the WSGI handler from `concurrency` threads,
+    like a threaded WSGI server does.
+    """
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(
+            run_sync_requests,
+            (paths[index::concurrency] for index in range(concurrency)),
+        ))
+    elapsed = time.perf_counter() - started
+    return get_load_report(
+        [latency for latencies, _ in results for latency in latencies],
+        sum(errors for _, errors in results),
+        elapsed,
+    )
+
+
+async def abenchmark_async_requests(paths, concurrency):
+    """
+    Sends GET requests through the ASGI handler from `concurrency`
+    coroutines on one event loop.
+    """
+    client = AsyncClient()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def send(path):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.get(path)
+            latencies.append((time.perf_counter() - started) * 1000)
+            errors += response.status_code != 200
+
+    started = time.perf_counter()
+    await asyncio.gather(*(send(path) for path in paths))
+    elapsed = time.perf_counter() - started
+    return get_load_report(latencies, errors, elapsed)
+
+
+def benchmark_balance_checks(samples=2000, concurrency=50):
+    """
+    Compares the sync balance view served by WSGI handler with the async
+    one served by ASGI handler under `concurrency` concurrent clients.
+    """
+    printable_numbers = get_sample_printable_numbers(samples)
+    if not printable_numbers:
+        return None
+    sync_paths = [
+        f"{reverse('cards:card_balance')}?number={printable_number}"
+        for printable_number in printable_numbers
+    ]
+    async_paths = [
+        f"{reverse('cards:async_card_balance')}?number={printable_number}"
+        for printable_number in printable_numbers
+    ]
+    with override_settings(**get_benchmark_settings()):
+        return {
+            "sync_wsgi": benchmark_sync_requests(sync_paths, concurrency),
+            "async_asgi": asyncio.run(
+                abenchmark_async_requests(async_paths, concurrency)
+            ),
+        }
+
+
+def seed_transactions(cards, transactions_per_card,
+                      batch_size=SEED_BATCH_SIZE):
+    """
+    Bulk inserts random credits for `cards` and moves their balances and
+    series statistics accordingly.
+    """
+    now = timezone.now()
+    chunk_size = max(batch_size // transactions_per_card, 1)
+    for pks in iter_pk_chunks(cards, chunk_size):
+        series_ids = dict(Card.objects.filter(pk__in=pks)
+                                      .values_list("pk", "series_id"))
+        transactions = [
+            Transaction(
+                card_id=pk,
+                amount=Decimal(random.randint(100, 10000)) / 100,
+                date_time=now - timedelta(minutes=random.randint(0, 43200)),
+                description="Benchmark credit",
+            )
+            for pk in pks for _ in range(transactions_per_card)
+        ]
+        balances = {}
+        for new_transaction in transactions:
+            balances[new_transaction.card_id] = (
+                balances.get(new_transaction.card_id, 0)
+                + new_transaction.amount
+            )
+        with transaction.atomic():
+            Transaction.objects.bulk_create(transactions,
+                                            batch_size=batch_size)
+            Card.objects.filter(pk__in=pks).update(
+                balance=F("balance") + Case(
+                    *(When(pk=pk, then=Value(balance))
+                      for pk, balance in balances.items()),
+                    output_field=DecimalField(),
+                ),
+                last_used_date=now,
+            )
+            apply_series_stats_deltas(get_transaction_deltas(
+                (series_ids[new_transaction.card_id], new_transaction.amount)
+                for new_transaction in transactions
+            ))
+
+
+def seed_benchmark_data(series_count, cards_per_series,
+                        transactions_per_card, seed=None):
+    """
+    Seeds series with cards, activates half of every series and credits
+    active cards with transactions.
+    """
+    random.seed(seed)
+    seed_cards(series_count, cards_per_series)
+    bulk_set_active(
+        Card.objects.filter(number__lte=cards_per_series // 2), True
+    )
+    sweep_outdated_cards()
+    if transactions_per_card:
+        seed_transactions(Card.objects.with_status(Card.ACTIVATED),
+                          transactions_per_card)
+
+
+def measure_calls(calls, warmup=1):
+    """
+    Times every zero-argument callable of `calls` once.
+
+    Returns latency percentiles in ms, average query count and peak
+    memory of Python allocations, traced in a separate pass so tracing
+    does not slow down timed calls.
+    """
+    for call in calls[:warmup]:
+        call()
+    latencies = []
+    # request_started signal resets connection.queries, so queries are
+    # counted by an execute wrapper instead of CaptureQueriesContext
+    recorder = QueryRecorder()
+    with connection.execute_wrapper(recorder):
+        for call in calls:
+            started = time.perf_counter()
+            call()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    try:
+        for call in calls[:warmup + 1]:
+            call()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "calls": len(latencies),
+        "min_ms": min(latencies),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": max(latencies),
+        "queries": recorder.count / len(latencies),
+        "peak_memory_kb": peak_memory // 1024,
+    }
+
+
+def get_request_call(client, path):
+    def call():
+        response = client.get(path)
+        if response.status_code not in (200, 302):
+            raise AssertionError(
+                f"GET {path} returned {response.status_code}."
+            )
+    return call
+
+
+def get_search_query_string(params):
+    query = {}
+    for name, value in params.items():
+        if isinstance(value, datetime):
+            query.update({
+                f"{name}_year": value.year,
+                f"{name}_month": value.month,
+                f"{name}_day": value.day,
+            })
+        else:
+            query[name] = value
+    return urlencode(sorted(query.items()))
+
+
+def get_benchmark_scenarios(samples, generate_count):
+    """
+    Returns `{name: calls}` of benchmarked operations over seeded data.
+    """
+    client = Client()
+    card_ids = list(Card.objects.values_list("pk", flat=True))
+    sample_ids = [random.choice(card_ids) for _ in range(samples)]
+    scenarios = {}
+
+    card_series = CardSeries.objects.order_by("pk").first()
+    scenarios["generate_cards"] = [
+        partial(generate_cards, card_series, generate_count)
+        for _ in range(max(samples // 20, 3))
+    ]
+    scenarios["card_list_first_page"] = [
+        get_request_call(client, reverse("cards:card_list"))
+    ] * samples
+    scenarios["card_list_deep_page"] = [
+        get_request_call(client, f"{reverse('cards:card_list')}?after={pk}")
+        for pk in sample_ids
+    ]
+    lookups = list(get_search_field_groups())
+    for size in range(1, len(lookups) + 1):
+        for combination in combinations(lookups, size):
+            params = {}
+            for lookup in combination:
+                params.update(get_search_params(lookup))
+            path = (f"{reverse('cards:card_search')}?"
+                    f"{get_search_query_string(params)}")
+            name = "card_search:" + "+".join(combination)
+            scenarios[name] = [get_request_call(client, path)] * max(
+                samples // 10, 3
+            )
+    scenarios["card_detail"] = [
+        get_request_call(client, reverse("cards:card_detail", args=(pk,)))
+        for pk in sample_ids
+    ]
+    scenarios["card_activation"] = [
+        get_request_call(client, reverse(view_name, args=(pk,)))
+        for pk in sample_ids
+        for view_name in ("cards:activate_card", "cards:deactivate_card")
+    ]
+    return scenarios
+
+
+@contextmanager
+def silence_loggers(*names):
+    loggers = [logging.getLogger(name) for name in names]
+    disabled = [logger.disabled for logger in loggers]
+    for logger in loggers:
+        logger.disabled = True
+    try:
+        yield
+    finally:
+        for logger, was_disabled in zip(loggers, disabled):
+            logger.disabled = was_disabled
+
+
+def run_benchmark_suite(samples=200, generate_count=1000, scenario=None):
+    """
+    Measures every benchmark scenario matching `scenario` name prefix.
+
+    SQL and per-request logging is silenced, as writing it to console
+    would dominate measured latencies.
+    """
+    results = {}
+    with silence_loggers("django.db.backends", "cards.middleware"):
+        with override_settings(**get_benchmark_settings()):
+            scenarios = get_benchmark_scenarios(samples, generate_count)
+            for name, calls in scenarios.items():
+                if scenario is None or name.startswith(scenario):
+                    results[name] = measure_calls(calls)
+    return results
+
+
+def compare_reports(report, baseline_report, metric="p95_ms"):
+    """
+    Returns `(name, baseline, current, change)` of scenarios in both
+    reports, `change` being relative.
+    """
+    comparison = []
+    for name, result in report["scenarios"].items():
+        baseline = baseline_report["scenarios"].get(name)
+        if baseline is None:
+            continue
+        change = (result[metric] - baseline[metric]) / max(
+            baseline[metric], 1e-9
+        )
+        comparison.append((name, baseline[metric], result[metric], change))
+    return comparison
+
+
+def seed_writer_cards(cards_count):
+    card_series = CardSeries.objects.create(
+        description="Benchmark writers series",
+        duration=CardSeries.ONE_YEAR,
+    )
+    generate_cards(card_series, cards_count)
+    bulk_set_active(Card.objects.filter(series=card_series), True)
+    return list(Card.objects.filter(series=card_series)
+                            .order_by("pk")
+                            .values_list("pk", flat=True))
+
+
+def run_writer(card_ids, transactions_count):
+    latencies = []
+    errors = 0
+    try:
+        for index in range(transactions_count):
+            started = time.perf_counter()
+            try:
+                post_transaction(card_ids[index % len(card_ids)],
+                                 Decimal("1.00"), "Benchmark credit")
+            except OperationalError:
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+    finally:
+        connection.close()
+    return latencies, errors
+
+
+def benchmark_concurrent_writers(card_ids, writers, transactions_per_writer,
+                                 overrides=None):
+    """
+    Posts transactions from `writers` threads, each on its own cards.
+
+    Connections are reopened, so connection settings in `overrides`
+    apply to all of them.
+    """
+    with override_settings(**(overrides or {})), silence_loggers("cards.db"):
+        connections.close_all()
+        # journal mode can only be switched without concurrent connections
+        connection.ensure_connection()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=writers) as executor:
+            results = list(executor.map(
+                run_writer,
+                (card_ids[index::writers] for index in range(writers)),
+                [transactions_per_writer] * writers,
+            ))
+        elapsed = time.perf_counter() - started
+        connections.close_all()
+    return get_load_report(
+        [latency for latencies, _ in results for latency in latencies],
+        sum(errors for _, errors in results),
+        elapsed,
+    )
+
+
+def benchmark_card_codec(count=1000000, series_count=100, seed=42):
+    """
+    Measures card numbers encoded and decoded per second.
+
+    Unchecked f-string formatting and partition parsing of the numbers
+    without check digit are measured as the baseline.
+    """
+    sampler = random.Random(seed)
+    pairs = [
+        (sampler.randint(1, series_count), sampler.randrange(1, NUMBER_LIMIT))
+        for _ in range(count)
+    ]
+    printable_numbers = encode_many(pairs)
+    unchecked_numbers = [value[:-2] for value in printable_numbers]
+    calls = {
+        "format_unchecked": lambda: [
+            f"{series:0>5}-{number:0>7}" for series, number in pairs
+        ],
+        "encode": lambda: [encode(series, number) for series, number in pairs],
+        "encode_many": partial(encode_many, pairs),
+        "parse_unchecked": lambda: [
+            (int(series), int(number))
+            for series, _, number in (value.partition("-")
+                                      for value in unchecked_numbers)
+        ],
+        "decode": lambda: [decode(value) for value in printable_numbers],
+        "decode_many": partial(decode_many, printable_numbers),
+    }
+    results = {}
+    for name, call in calls.items():
+        started = time.perf_counter()
+        call()
+        elapsed = time.perf_counter() - started
+        results[name] = {
+            "numbers": count,
+            "elapsed": elapsed,
+            "numbers_per_second": count / elapsed,
+        }
+    return results
@@ -0,0 +1,225 @@
+import time
+from collections import Counter
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from .cache import invalidate_cards
+from .models import TRANSACTION_MODELS, Card, CardSeries, TransactionRollup
+from .series_stats import (TRANSACTION_TOTALS, apply_series_stats_deltas,
+                           get_deletion_deltas, get_status_deltas, new_deltas)
+
+
+@dataclass
+class BulkStats:
+    cards_affected: int = 0
+    transactions_deleted: int = 0
+    series_deleted: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self):
+        if not self.elapsed:
+            return 0.0
+        rows = self.cards_affected + self.transactions_deleted
+        return rows / self.elapsed
+
+
+def iter_pk_chunks(queryset, chunk_size):
+    """
+    Yields primary keys of `queryset` in ascending chunks.
+
+    Every chunk is fetched with a keyset condition on the primary key, so
+    rows changed or deleted by the caller between chunks are not skipped.
+    """
+    last_pk = 0
+    while True:
+        pks = list(queryset.filter(pk__gt=last_pk)
+                           .order_by("pk")
+                           .values_list("pk", flat=True)[:chunk_size])
+        if not pks:
+            return
+        yield pks
+        last_pk = pks[-1]
+
+
+def bulk_set_active(queryset, is_active, chunk_size=None,
+                    progress_callback=None):
+    """
+    Activates or deactivates cards of `queryset` with chunked UPDATEs.
+
+    Outdated cards keep their status.
+    """
+    if chunk_size is None:
+        chunk_size = settings.CARDS_BULK_CHUNK_SIZE
+    status = Card.ACTIVATED if is_active else Card.NOT_ACTIVATED
+
+    stats = BulkStats()
+    started = time.perf_counter()
+    for pks in iter_pk_chunks(queryset, chunk_size):
+        with transaction.atomic():
+            status_counts = Counter(
+                Card.objects.filter(pk__in=pks)
+                            .exclude(status=Card.OUTDATED)
+                            .select_for_update()
+                            .values_list("series_id", "status")
+            )
+            stats.cards_affected += Card.objects.filter(pk__in=pks).update(
+                is_active=is_active,
+                status=Case(
+                    When(status=Card.OUTDATED, then=Value(Card.OUTDATED)),
+                    default=Value(status),
+                ),
+            )
+            invalidate_cards(pks)
+            apply_series_stats_deltas(get_status_deltas(status_counts,
+                                                        status))
+        stats.elapsed = time.perf_counter() - started
+        if progress_callback is not None:
+            progress_callback(stats)
+    return stats
+
+
+def raw_delete(queryset):
+    """
+    Deletes `queryset` rows with one DELETE statement.
+
+    Unlike QuerySet.delete() related rows are neither collected nor
+    deleted, and no delete signals are sent, so callers delete dependent
+    rows first and invalidate cache and series statistics themselves.
+    """
+    model = queryset.model
+    connection = connections[queryset.db]
+    quote_name = connection.ops.quote_name
+    pks_query, params = (queryset.order_by()
+                                 .values("pk")
+                                 .query.get_compiler(queryset.db)
+                                 .as_sql())
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {quote_name(model._meta.db_table)} "
+            f"WHERE {quote_name(model._meta.pk.column)} IN ({pks_query})",
+            params,
+        )
+        return cursor.rowcount
+
+
+def delete_transactions_chunk(model, pks):
+    """
+    Deletes `model` transactions with `pks`, returns deleted rows count.
+
+    Balances of cards are not changed, only transaction totals of series
+    statistics.
+    """
+    with transaction.atomic():
+        transactions = model.objects.filter(pk__in=pks)
+        deltas = new_deltas()
+        for row in (transactions.values(series_id=F("card__series_id"))
+                                .annotate(**TRANSACTION_TOTALS)
+                                .order_by()):
+            deltas[row.pop("series_id")].subtract(row)
+        deleted = raw_delete(transactions)
+        apply_series_stats_deltas(deltas)
+    return deleted
+
+
+def delete_card_transactions(card_ids, chunk_size=None):
+    """
+    Deletes hot and archived transactions of `card_ids` chunk by chunk.
+
+    Every chunk is deleted in its own transaction, so locks are held for a
+    bounded time however many transactions cards have.
+    """
+    if chunk_size is None:
+        chunk_size = settings.CARDS_BULK_CHUNK_SIZE
+
+    deleted = 0
+    for model in TRANSACTION_MODELS:
+        transactions = model.objects.filter(card_id__in=card_ids)
+        for pks in iter_pk_chunks(transactions, chunk_size):
+            deleted += delete_transactions_chunk(model, pks)
+    return deleted
+
+
+def delete_cards_chunk(pks):
+    """
+    Deletes cards with `pks` and transactions left on them.
+
+    Returns deleted cards and transactions counts. Cards are locked first,
+    so no transaction is posted to them until they are deleted.
+    """
+    with transaction.atomic():
+        cards = Card.objects.filter(pk__in=pks)
+        list(cards.select_for_update().values_list("pk", flat=True))
+        deltas = get_deletion_deltas(cards)
+        transactions_deleted = sum(
+            raw_delete(model.objects.filter(card_id__in=pks))
+            for model in TRANSACTION_MODELS
+        )
+        cards_deleted = raw_delete(cards)
+        invalidate_cards(pks)
+        apply_series_stats_deltas(deltas)
+    return cards_deleted, transactions_deleted
+
+
+def bulk_delete(queryset, chunk_size=None, progress_callback=None,
+                stats=None):
+    """
+    Deletes cards of `queryset` with their transactions chunk by chunk.
+
+    Transactions of every chunk of cards are deleted first in chunks of
+    their own, then cards are deleted with one raw DELETE.
+    """
+    if chunk_size is None:
+        chunk_size = settings.CARDS_BULK_CHUNK_SIZE
+
+    if stats is None:
+        stats = BulkStats()
+    started = time.perf_counter() - stats.elapsed
+    for pks in iter_pk_chunks(queryset, chunk_size):
+        stats.transactions_deleted += delete_card_transactions(pks,
+                                                               chunk_size)
+        cards_deleted, transactions_deleted = delete_cards_chunk(pks)
+        stats.cards_affected += cards_deleted
+        stats.transactions_deleted += transactions_deleted
+        stats.elapsed = time.perf_counter() - started
+        if progress_callback is not None:
+            progress_callback(stats)
+    return stats
+
+
+def purge_series(series_ids, chunk_size=None, progress_callback=None):
+    """
+    Deletes card series with their cards, transactions and rollups.
+
+    Cards and transactions are deleted by bulk_delete, then the emptied
+    series are deleted one by one, so no delete of a million-card series
+    collects its cards into memory.
+    """
+    stats = BulkStats()
+    for series_id in sorted(series_ids):
+        bulk_delete(Card.objects.filter(series_id=series_id), chunk_size,
+                    progress_callback, stats=stats)
+        with transaction.atomic():
+            raw_delete(TransactionRollup.objects.filter(series_id=series_id))
+            _, deleted = CardSeries.objects.filter(pk=series_id).delete()
+        stats.series_deleted += deleted.get(CardSeries._meta.label, 0)
+    return stats
+
+
+def purge_expired_series(expired_before=None, chunk_size=None,
+                         progress_callback=None):
+    """
+    Purges card series expired before `expired_before`, now by default.
+    """
+    if expired_before is None:
+        expired_before = timezone.now()
+    return purge_series(
+        CardSeries.objects.filter(valid_until__lte=expired_before)
+                          .values_list("pk", flat=True),
+        chunk_size,
+        progress_callback,
+    )
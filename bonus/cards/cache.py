@@ -0,0 +1,103 @@
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Card, CardSeries
+
+CARD_KEY = "cards:card:{}"
+CARD_SERIES_KEY = "cards:card_series:{}"
+
+
+class CacheCounters:
+    """
+    Thread-safe per-process hit/miss counters of cards cache namespaces.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def add(self, namespace, hits=0, misses=0):
+        with self._lock:
+            counters = self._counters.setdefault(
+                namespace, {"hits": 0, "misses": 0}
+            )
+            counters["hits"] += hits
+            counters["misses"] += misses
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                namespace: {
+                    **counters,
+                    "hit_ratio": counters["hits"] / max(
+                        counters["hits"] + counters["misses"], 1
+                    ),
+                }
+                for namespace, counters in self._counters.items()
+            }
+
+
+cache_counters = CacheCounters()
+
+
+def get_card(pk):
+    """
+    Returns card with its series, raises Card.DoesNotExist.
+    """
+    key = CARD_KEY.format(pk)
+    card = cache.get(key)
+    if card is not None:
+        cache_counters.add("card", hits=1)
+    else:
+        cache_counters.add("card", misses=1)
+        card = Card.objects.get(pk=pk)
+        cache.set(key, card, settings.CARDS_CACHE_TIMEOUT)
+    attach_card_series((card,))
+    return card
+
+
+def get_card_series_many(pks):
+    """
+    Returns card series by primary key, fetching cache misses at once.
+    """
+    keys = {CARD_SERIES_KEY.format(pk): pk for pk in set(pks)}
+    cached = cache.get_many(keys)
+    card_series = {keys[key]: value for key, value in cached.items()}
+    missing = [pk for pk in keys.values() if pk not in card_series]
+    cache_counters.add("card_series", hits=len(cached), misses=len(missing))
+    if missing:
+        fetched = {
+            series.pk: series
+            for series in CardSeries.objects.filter(pk__in=missing)
+        }
+        cache.set_many(
+            {CARD_SERIES_KEY.format(pk): series
+             for pk, series in fetched.items()},
+            settings.CARDS_CACHE_TIMEOUT,
+        )
+        card_series.update(fetched)
+    return card_series
+
+
+def attach_card_series(cards):
+    """
+    Sets cached series on `cards` instead of joining them in the query.
+    """
+    card_series = get_card_series_many(card.series_id for card in cards)
+    for card in cards:
+        card.series = card_series[card.series_id]
+    return cards
+
+
+def invalidate_cards(pks):
+    keys = [CARD_KEY.format(pk) for pk in pks]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_card_series(pk):
+    transaction.on_commit(
+        lambda: cache.delete(CARD_SERIES_KEY.format(pk))
+    )
@@ -0,0 +1,176 @@
+SERIES_DIGITS = 5
+NUMBER_DIGITS = 7
+SERIES_LIMIT = 10 ** SERIES_DIGITS
+NUMBER_LIMIT = 10 ** NUMBER_DIGITS
+PRINTABLE_LENGTH = SERIES_DIGITS + NUMBER_DIGITS + 3
+BARCODE_LENGTH = SERIES_DIGITS + NUMBER_DIGITS + 1
+BLOCK_LIMIT = 10 ** 4
+
+
+def get_block_luhn_sum(block):
+    """
+    Returns Luhn sum of a 4 digit block, doubling its last digit.
+    """
+    total = 0
+    for position, digit in enumerate(reversed(f"{block:04d}")):
+        digit = int(digit)
+        if position % 2 == 0:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total += digit
+    return total
+
+
+# Luhn sum is a sum of per digit terms, and blocks of even length double
+# the same positions, so the sum of a number is looked up as 3 digit high
+# and 4 digit low blocks, and the sum of a series as a shifted block
+LUHN_SUMS = tuple(get_block_luhn_sum(block) for block in range(BLOCK_LIMIT))
+CHECK_DIGITS = tuple(str(-total % 10) for total in range(3 * 9 * 4 + 1))
+HIGH_STRINGS = tuple(f"{high:03d}" for high in range(1000))
+LOW_STRINGS = tuple(f"{low:04d}-" for low in range(BLOCK_LIMIT))
+HIGH_VALUES = {string: high for high, string in enumerate(HIGH_STRINGS)}
+LOW_VALUES = {string[:-1]: low for low, string in enumerate(LOW_STRINGS)}
+
+
+def get_series_luhn_sum(series):
+    return LUHN_SUMS[series % 10 * 1000] + LUHN_SUMS[series // 10]
+
+
+def get_check_digit(series, number):
+    """
+    Returns Luhn check digit of `series` and `number` as a string.
+    """
+    high, low = divmod(number, BLOCK_LIMIT)
+    return CHECK_DIGITS[get_series_luhn_sum(series)
+                        + LUHN_SUMS[high] + LUHN_SUMS[low]]
+
+
+def check_range(series, number):
+    if not (0 <= series < SERIES_LIMIT and 0 <= number < NUMBER_LIMIT):
+        raise ValueError(f"Card number out of range: {series}-{number}")
+
+
+def encode(series, number):
+    """
+    Returns `SSSSS-NNNNNNN-C` printable card number with check digit.
+    """
+    check_range(series, number)
+    return f"{series:05d}-{number:07d}-{get_check_digit(series, number)}"
+
+
+def encode_legacy(series, number):
+    """
+    Returns `SSSSS-NNNNNNN` printable card number without check digit.
+    """
+    return f"{series:0>5}-{number:0>7}"
+
+
+def encode_printable(series, number):
+    """
+    Returns printable card number of a stored card.
+
+    Cards stored with numbers out of check digit range are printed in
+    legacy form, which decode() still accepts.
+    """
+    if 0 <= series < SERIES_LIMIT and 0 <= number < NUMBER_LIMIT:
+        return encode(series, number)
+    return encode_legacy(series, number)
+
+
+def encode_barcode(series, number):
+    """
+    Returns `SSSSSNNNNNNNC` 13 digit barcode card number.
+    """
+    check_range(series, number)
+    return f"{series:05d}{number:07d}{get_check_digit(series, number)}"
+
+
+def encode_many(pairs):
+    """
+    Returns printable card numbers of `(series, number)` pairs.
+
+    Series prefixes and Luhn sums are computed once per series, numbers
+    are assembled from precomputed block strings. Numbers out of check
+    digit range are returned in legacy form, like encode_printable().
+    """
+    series_prefixes = {}
+    printable_numbers = []
+    append = printable_numbers.append
+    for series, number in pairs:
+        series_prefix = series_prefixes.get(series)
+        if series_prefix is None:
+            series_prefix = series_prefixes[series] = (
+                (f"{series:05d}-", get_series_luhn_sum(series))
+                if 0 <= series < SERIES_LIMIT else (None, 0)
+            )
+        prefix, series_sum = series_prefix
+        if prefix is None or not 0 <= number < NUMBER_LIMIT:
+            append(encode_legacy(series, number))
+            continue
+        high, low = divmod(number, BLOCK_LIMIT)
+        check_digit = CHECK_DIGITS[series_sum + LUHN_SUMS[high]
+                                   + LUHN_SUMS[low]]
+        append(f"{prefix}{HIGH_STRINGS[high]}{LOW_STRINGS[low]}{check_digit}")
+    return printable_numbers
+
+
+def decode(value):
+    """
+    Returns `(series, number)` of printable, barcode or legacy card number.
+
+    Printable `SSSSS-NNNNNNN-C` and barcode `SSSSSNNNNNNNC` numbers are
+    verified with their check digit, so mistyped numbers are rejected
+    without a database query. Legacy `SSSSS-NNNNNNN` numbers printed
+    before check digits are accepted as is.
+    """
+    value = value.strip()
+    parts = value.split("-")
+    if len(parts) == 1 and len(value) == BARCODE_LENGTH:
+        parts = [value[:SERIES_DIGITS], value[SERIES_DIGITS:-1], value[-1]]
+    if len(parts) not in (2, 3) or not all(part.isdigit() for part in parts):
+        raise ValueError(f"Incorrect card number: {value!r}")
+    series, number = int(parts[0]), int(parts[1])
+    if len(parts) == 3:
+        if (len(parts[2]) != 1 or series >= SERIES_LIMIT
+                or number >= NUMBER_LIMIT):
+            raise ValueError(f"Incorrect card number: {value!r}")
+        if parts[2] != get_check_digit(series, number):
+            raise ValueError(f"Incorrect card number check digit: {value!r}")
+    return series, number
+
+
+def decode_many(values):
+    """
+    Returns `(series, number)` pairs of card numbers.
+
+    Canonical printable numbers are split at fixed offsets and blocks are
+    parsed and checked with table lookups, other forms fall back to
+    decode(). Raises ValueError on the first incorrect number.
+    """
+    series_values = {}
+    pairs = []
+    append = pairs.append
+    for value in values:
+        if len(value) != PRINTABLE_LENGTH or value[13] != "-":
+            append(decode(value))
+            continue
+        series_value = series_values.get(value[:6])
+        if series_value is None:
+            series_string = value[:5]
+            if not (series_string.isdigit() and value[5] == "-"):
+                raise ValueError(f"Incorrect card number: {value!r}")
+            series = int(series_string)
+            series_value = series_values[value[:6]] = (
+                series, get_series_luhn_sum(series)
+            )
+        series, series_sum = series_value
+        high = HIGH_VALUES.get(value[6:9])
+        low = LOW_VALUES.get(value[9:13])
+        if high is None or low is None:
+            raise ValueError(f"Incorrect card number: {value!r}")
+        if (CHECK_DIGITS[series_sum + LUHN_SUMS[high] + LUHN_SUMS[low]]
+                != value[14]):
+            raise ValueError(f"Incorrect card number check digit: {value!r}")
+        append((series, high * BLOCK_LIMIT + low))
+    return pairs
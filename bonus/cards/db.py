@@ -0,0 +1,59 @@
+import logging
+import random
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def apply_sqlite_pragmas(connection, pragmas=None):
+    """
+    Tunes a new SQLite connection with CARDS_SQLITE_PRAGMAS.
+
+    WAL journal lets readers run alongside the writer, and NORMAL
+    synchronous mode only syncs the WAL at checkpoints, which is still
+    safe from corruption in WAL mode.
+    """
+    if pragmas is None:
+        pragmas = settings.CARDS_SQLITE_PRAGMAS
+    # the raw DB-API connection bypasses execute wrappers, so the pragmas
+    # are not counted as queries of the request opening the connection
+    for name, value in pragmas.items():
+        connection.connection.execute(f"PRAGMA {name} = {value}")
+
+
+def begin_immediate(execute, sql, params, many, context):
+    """
+    Execute wrapper starting SQLite transactions with BEGIN IMMEDIATE.
+
+    A deferred transaction reading before it writes can not wait for the
+    write lock held by another connection and fails with "database is
+    locked" at once, immediate ones wait for the busy timeout instead.
+    """
+    if sql == "BEGIN":
+        sql = "BEGIN IMMEDIATE"
+    return execute(sql, params, many, context)
+
+
+class SlowQueryLogger:
+    """
+    Execute wrapper logging queries slower than CARDS_SLOW_QUERY_MS and a
+    CARDS_QUERY_LOG_SAMPLE_RATE share of the others.
+
+    Replaces DEBUG level logging of every SQL statement, which is too
+    verbose and slow to be left on.
+    """
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - started) * 1000
+            if duration >= settings.CARDS_SLOW_QUERY_MS:
+                logger.warning("Slow query (%.2f ms): %s", duration, sql)
+            elif random.random() < settings.CARDS_QUERY_LOG_SAMPLE_RATE:
+                logger.info("Sampled query (%.2f ms): %s", duration, sql)
+
+
+slow_query_logger = SlowQueryLogger()
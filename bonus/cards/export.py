@@ -0,0 +1,166 @@
+import csv
+import zlib
+from itertools import islice
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .codec import encode_many
+from .models import Card, Transaction
+from .utils import search_cards
+
+CARD_EXPORT_FIELDS = (
+    "id",
+    "printable_number",
+    "series",
+    "number",
+    "status",
+    "valid_until",
+    "balance",
+    "is_active",
+    "last_used_date",
+)
+TRANSACTION_EXPORT_FIELDS = (
+    "id",
+    "card",
+    "printable_number",
+    "amount",
+    "date_time",
+    "description",
+)
+GZIP_BUFFER_SIZE = 64 * 1024
+
+
+class Echo:
+    """
+    Pseudo-buffer returning written value instead of storing it.
+    """
+    def write(self, value):
+        return value
+
+
+def iter_chunks(rows, chunk_size):
+    while chunk := list(islice(rows, chunk_size)):
+        yield chunk
+
+
+def iter_card_rows(search_query_params=None, chunk_size=None):
+    if chunk_size is None:
+        chunk_size = settings.CARDS_EXPORT_CHUNK_SIZE
+    cards = (search_cards(search_query_params or {})
+             .order_by("pk")
+             .values_list("pk", "series_id", "number", "status",
+                          "series__valid_until", "balance", "is_active",
+                          "last_used_date"))
+    for chunk in iter_chunks(cards.iterator(chunk_size=chunk_size),
+                             chunk_size):
+        printable_numbers = encode_many(
+            (series, number) for _, series, number, *_ in chunk
+        )
+        for row, printable_number in zip(chunk, printable_numbers):
+            (pk, series, number, status, valid_until, balance, is_active,
+             last_used_date) = row
+            yield (
+                pk,
+                printable_number,
+                series,
+                number,
+                Card.HUMANREADABLE_CARD_STATUSES.get(status),
+                valid_until,
+                balance,
+                is_active,
+                last_used_date,
+            )
+
+
+def iter_transaction_rows(search_query_params=None, chunk_size=None):
+    if chunk_size is None:
+        chunk_size = settings.CARDS_EXPORT_CHUNK_SIZE
+    card_query_params = {
+        f"card__{key}": value
+        for key, value in (search_query_params or {}).items()
+        if value is not None
+    }
+    transactions = (Transaction.objects
+                               .filter(**card_query_params)
+                               .order_by("pk")
+                               .values_list("pk", "card_id",
+                                            "card__series_id",
+                                            "card__number", "amount",
+                                            "date_time", "description"))
+    for chunk in iter_chunks(transactions.iterator(chunk_size=chunk_size),
+                             chunk_size):
+        printable_numbers = encode_many(
+            (series, number) for _, _, series, number, *_ in chunk
+        )
+        for row, printable_number in zip(chunk, printable_numbers):
+            pk, card_id, _, _, amount, date_time, description = row
+            yield (
+                pk,
+                card_id,
+                printable_number,
+                amount,
+                date_time,
+                description,
+            )
+
+
+def iter_csv(rows, fields):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def iter_jsonl(rows, fields):
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield encoder.encode(dict(zip(fields, row))) + "\n"
+
+
+def iter_gzip(chunks):
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    buffer = []
+    buffer_size = 0
+    for chunk in chunks:
+        data = chunk.encode()
+        buffer.append(data)
+        buffer_size += len(data)
+        if buffer_size >= GZIP_BUFFER_SIZE:
+            compressed = compressor.compress(b"".join(buffer))
+            buffer, buffer_size = [], 0
+            if compressed:
+                yield compressed
+    yield compressor.compress(b"".join(buffer)) + compressor.flush()
+
+
+def iter_export(model_name, search_query_params=None, data_format="csv",
+                compress=False, chunk_size=None):
+    """
+    Yields exported cards or transactions as CSV or JSON lines chunks.
+
+    Rows are read with server-side chunked iteration and serialized one
+    at a time, so memory usage does not depend on exported rows count.
+    Chunks are str, or gzip compressed bytes with `compress`.
+    """
+    if model_name == "transactions":
+        rows = iter_transaction_rows(search_query_params, chunk_size)
+        fields = TRANSACTION_EXPORT_FIELDS
+    else:
+        rows = iter_card_rows(search_query_params, chunk_size)
+        fields = CARD_EXPORT_FIELDS
+
+    if data_format == "jsonl":
+        chunks = iter_jsonl(rows, fields)
+    else:
+        chunks = iter_csv(rows, fields)
+    if compress:
+        return iter_gzip(chunks)
+    return chunks
+
+
+def get_export_file_name(model_name, data_format, compress=False):
+    file_name = f"{model_name}.{data_format}"
+    if compress:
+        return f"{file_name}.gz"
+    return file_name
@@ -1,8 +1,12 @@
+from datetime import datetime, time, timedelta
+
 from django import forms
 from django.core.exceptions import ValidationError
-from django.core.validators import MinValueValidator
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.utils import timezone
 
-from .models import CardSeries
+from .codec import NUMBER_LIMIT
+from .models import CardSeries, TransactionRollup
 
 
 class CardSeriesCreationForm(forms.ModelForm):
@@ -22,12 +26,18 @@ class CardGenerationForm(forms.Form):
         help_text="Input cards count",
         validators=(
             MinValueValidator(1, "Minimum card count to generate is 1."),
+            MaxValueValidator(
+                NUMBER_LIMIT - 1,
+                "Card series can not have more cards than numbers.",
+            ),
         ),
         initial=10,
     )
 
 
 class CardSearchForm(forms.Form):
+    conditions_required = True
+
     series__gte = forms.IntegerField(
         min_value=1,
         label="Card series from",
@@ -64,13 +74,13 @@ class CardSearchForm(forms.Form):
         required=False,
         widget=forms.SelectDateWidget(),
     )
-    valid_until_date__gte = forms.DateTimeField(
+    series__valid_until__gte = forms.DateTimeField(
         label="Valid after",
         help_text="Valid after",
         required=False,
         widget=forms.SelectDateWidget(),
     )
-    valid_until_date__lte = forms.DateTimeField(
+    series__valid_until__lte = forms.DateTimeField(
         label="Valid before",
         help_text="Valid before",
         required=False,
@@ -85,8 +95,8 @@ class CardSearchForm(forms.Form):
         number__lte = cleaned_data.get("number__lte")
         series__issue_date__gte = cleaned_data.get("series__issue_date__gte")
         series__issue_date__lte = cleaned_data.get("series__issue_date__lte")
-        valid_until_date__gte = cleaned_data.get("valid_until_date__gte")
-        valid_until_date__lte = cleaned_data.get("valid_until_date__lte")
+        series__valid_until__gte = cleaned_data.get("series__valid_until__gte")
+        series__valid_until__lte = cleaned_data.get("series__valid_until__lte")
 
         if series__gte and series__lte:
             if series__gte > series__lte:
@@ -100,8 +110,8 @@ class CardSearchForm(forms.Form):
             if series__issue_date__gte > series__issue_date__lte:
                 raise ValidationError("Incorrect issue date bound!")
 
-        if valid_until_date__gte and valid_until_date__lte:
-            if valid_until_date__gte > valid_until_date__lte:
+        if series__valid_until__gte and series__valid_until__lte:
+            if series__valid_until__gte > series__valid_until__lte:
                 raise ValidationError("Incorrect valid until bound!")
 
         conditions = (
@@ -111,9 +121,119 @@ class CardSearchForm(forms.Form):
             number__lte,
             series__issue_date__gte,
             series__issue_date__lte,
-            valid_until_date__gte,
-            valid_until_date__lte,
+            series__valid_until__gte,
+            series__valid_until__lte,
         )
 
-        if not any(conditions):
+        if self.conditions_required and not any(conditions):
             raise ValidationError("No conditions specified!")
+
+    def get_search_query_params(self):
+        return {
+            key: value for key, value in self.cleaned_data.items()
+            if key in CardSearchForm.base_fields
+        }
+
+
+class CardExportForm(CardSearchForm):
+    CSV = "csv"
+    JSONL = "jsonl"
+
+    EXPORT_FORMATS = [
+        (CSV, "CSV"),
+        (JSONL, "JSON lines"),
+    ]
+
+    conditions_required = False
+
+    data_format = forms.ChoiceField(
+        choices=EXPORT_FORMATS,
+        label="Export format",
+        help_text="Export format",
+        required=False,
+    )
+    compress = forms.BooleanField(
+        label="Gzip",
+        help_text="Compress export with gzip",
+        required=False,
+    )
+
+    def clean_data_format(self):
+        return self.cleaned_data.get("data_format") or self.CSV
+
+
+class CardBulkActionForm(CardSearchForm):
+    ACTIVATE = "activate"
+    DEACTIVATE = "deactivate"
+    DELETE = "delete"
+
+    BULK_ACTIONS = [
+        (ACTIVATE, "Activate cards"),
+        (DEACTIVATE, "Deactivate cards"),
+        (DELETE, "Delete cards"),
+    ]
+
+    action = forms.ChoiceField(
+        choices=BULK_ACTIONS,
+        label="Action",
+        help_text="Action applied to all found cards",
+    )
+    confirm = forms.BooleanField(
+        label="Confirm",
+        help_text="Confirm action for all found cards",
+    )
+
+
+class TransactionAnalyticsForm(forms.Form):
+    series = forms.IntegerField(
+        min_value=1,
+        label="Card series",
+        help_text="Card series, all series if empty",
+        required=False,
+    )
+    period = forms.TypedChoiceField(
+        choices=TransactionRollup.ROLLUP_PERIODS,
+        coerce=int,
+        empty_value=None,
+        label="Period",
+        help_text="Bucket length",
+        required=False,
+    )
+    date_from = forms.DateField(
+        label="Date from",
+        help_text="First day of report",
+        required=False,
+        widget=forms.SelectDateWidget(),
+    )
+    date_to = forms.DateField(
+        label="Date to",
+        help_text="Last day of report",
+        required=False,
+        widget=forms.SelectDateWidget(),
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        date_to = cleaned_data.get("date_to") or timezone.localdate()
+        date_from = cleaned_data.get("date_from") or date_to - timedelta(30)
+        if date_from > date_to:
+            raise ValidationError("Incorrect date bound!")
+        if cleaned_data.get("period") is None:
+            cleaned_data["period"] = TransactionRollup.DAY
+        cleaned_data["date_from"] = date_from
+        cleaned_data["date_to"] = date_to
+        return cleaned_data
+
+    def get_analytics_params(self):
+        return {
+            "period": self.cleaned_data["period"],
+            "date_from": get_day_start(self.cleaned_data["date_from"]),
+            "date_to": get_day_start(
+                self.cleaned_data["date_to"] + timedelta(1)
+            ),
+            "series_id": self.cleaned_data.get("series"),
+        }
+
+
+def get_day_start(date):
+    return timezone.make_aware(datetime.combine(date, time.min))
@@ -0,0 +1,257 @@
+import csv
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, F, PositiveIntegerField, Q, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .codec import NUMBER_LIMIT, SERIES_LIMIT
+from .ledger import BALANCE_LIMIT
+from .models import Card, CardSeries, Transaction
+from .series_stats import (STATUS_COUNT_FIELDS, apply_series_stats_deltas,
+                           get_transaction_deltas, new_deltas)
+
+IMPORT_FIELDS = ("series", "number", "balance", "is_active")
+TRUE_VALUES = {"1", "true", "yes", "y", "t"}
+FALSE_VALUES = {"", "0", "false", "no", "n", "f"}
+OPENING_BALANCE_DESCRIPTION = "Opening balance"
+
+
+class ImportRowError(Exception):
+    pass
+
+
+class ImportConflict(Exception):
+    pass
+
+
+@dataclass
+class ImportStats:
+    rows_read: int = 0
+    cards_created: int = 0
+    rejected: list = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self):
+        if not self.elapsed:
+            return 0.0
+        return self.rows_read / self.elapsed
+
+
+def clean_card_row(row):
+    try:
+        series = int(row.get("series") or "")
+        number = int(row.get("number") or "")
+    except ValueError:
+        raise ImportRowError("Incorrect series or number.")
+    if series < 1 or number < 1:
+        raise ImportRowError("Series and number start from 1.")
+    if series >= SERIES_LIMIT or number >= NUMBER_LIMIT:
+        raise ImportRowError("Card number out of range.")
+    try:
+        balance = Decimal(row.get("balance") or "0").quantize(Decimal("0.01"))
+    except InvalidOperation:
+        raise ImportRowError("Incorrect balance.")
+    if not balance.is_finite():
+        raise ImportRowError("Incorrect balance.")
+    if balance < 0:
+        raise ImportRowError("Balance can not be negative.")
+    if balance >= BALANCE_LIMIT:
+        raise ImportRowError("Balance is too large.")
+    is_active = (row.get("is_active") or "").strip().lower()
+    if is_active not in TRUE_VALUES | FALSE_VALUES:
+        raise ImportRowError("Incorrect is_active.")
+    return series, number, balance, is_active in TRUE_VALUES
+
+
+def get_numbers_query(series_id, numbers):
+    first_number, last_number = min(numbers), max(numbers)
+    if last_number - first_number < 2 * len(numbers):
+        # vendor batches are mostly contiguous, a range scan is cheaper
+        # than probing the index for every number
+        return Q(series_id=series_id,
+                 number__gte=first_number,
+                 number__lte=last_number)
+    return Q(series_id=series_id, number__in=numbers)
+
+
+def get_cards_query(card_keys):
+    """
+    Returns a query matching cards by `(series_id, number)` pairs.
+    """
+    numbers = defaultdict(list)
+    for series_id, number in card_keys:
+        numbers[series_id].append(number)
+    query = Q()
+    for series_id, series_numbers in numbers.items():
+        query |= get_numbers_query(series_id, series_numbers)
+    return query
+
+
+def import_cards_chunk(rows, stats):
+    """
+    Validates and inserts a chunk of `(line_number, row)` card rows.
+
+    Existing series and already taken numbers are fetched with one query
+    each, so the chunk costs a constant number of queries. If a concurrent
+    import takes some of the numbers before the insert, the chunk is
+    rolled back and checked again.
+    """
+    cleaned_rows = []
+    for line_number, row in rows:
+        try:
+            cleaned_rows.append((line_number, clean_card_row(row)))
+        except ImportRowError as error:
+            stats.rejected.append((line_number, str(error)))
+
+    while True:
+        try:
+            with transaction.atomic():
+                cards_created, rejected = create_cards(cleaned_rows)
+        except ImportConflict:
+            continue
+        break
+    stats.cards_created += cards_created
+    stats.rejected.extend(rejected)
+
+
+def create_cards(cleaned_rows):
+    """
+    Inserts cleaned `(line_number, row)` card rows with their opening
+    balance transactions.
+
+    Returns the number of created cards and rejected `(line_number,
+    error)` pairs. Should be called inside a transaction.
+    """
+    series_ids = {series for _, (series, *_) in cleaned_rows}
+    existing_series = {
+        card_series.pk: card_series
+        for card_series in CardSeries.objects.filter(pk__in=series_ids)
+    }
+    taken_numbers = set()
+    if existing_series:
+        taken_numbers = set(
+            Card.objects.filter(get_cards_query(
+                (series, number) for _, (series, number, *_) in cleaned_rows
+                if series in existing_series
+            )).values_list("series_id", "number")
+        )
+
+    now = timezone.now()
+    rejected = []
+    cards = []
+    opening_balances = {}
+    next_numbers = {}
+    deltas = new_deltas()
+    for line_number, (series, number, balance, is_active) in cleaned_rows:
+        card_series = existing_series.get(series)
+        if card_series is None:
+            rejected.append((line_number, "Card series not found."))
+            continue
+        if (series, number) in taken_numbers:
+            rejected.append((line_number, "Card number already taken."))
+            continue
+        taken_numbers.add((series, number))
+        status = Card.ACTIVATED if is_active else Card.NOT_ACTIVATED
+        if card_series.valid_until <= now:
+            status = Card.OUTDATED
+        cards.append((series, number, str(balance), is_active, status))
+        if balance:
+            opening_balances[(series, number)] = balance
+        next_numbers[series] = max(next_numbers.get(series, 0), number + 1)
+        deltas[series]["cards_count"] += 1
+        if status in STATUS_COUNT_FIELDS:
+            deltas[series][STATUS_COUNT_FIELDS[status]] += 1
+
+    if insert_cards(cards) != len(cards):
+        raise ImportConflict
+    if opening_balances:
+        # balances are backed by transactions, so reconciliation keeps them
+        Transaction.objects.bulk_create(
+            Transaction(
+                card_id=card_id,
+                amount=opening_balances[(series, number)],
+                date_time=now,
+                description=OPENING_BALANCE_DESCRIPTION,
+            )
+            for card_id, series, number in (
+                Card.objects
+                    .filter(get_cards_query(opening_balances))
+                    .values_list("pk", "series_id", "number")
+            )
+            if (series, number) in opening_balances
+        )
+    if next_numbers:
+        # keep the generation counter ahead of imported numbers
+        CardSeries.objects.filter(pk__in=list(next_numbers)).update(
+            next_number=Greatest("next_number", Case(
+                *(When(pk=series_id, then=Value(next_number))
+                  for series_id, next_number in next_numbers.items()),
+                default=F("next_number"),
+                output_field=PositiveIntegerField(),
+            )),
+        )
+    for series_id, changes in get_transaction_deltas(
+        (series, balance) for (series, _), balance in opening_balances.items()
+    ).items():
+        deltas[series_id].update(changes)
+    apply_series_stats_deltas(deltas)
+    return len(cards), rejected
+
+
+def insert_cards(cards):
+    """
+    Inserts `(series, number, balance, is_active, status)` rows skipping
+    conflicting numbers. Returns the number of inserted rows.
+
+    A plain executemany avoids model instantiation cost of bulk_create,
+    which dominates import time for large files.
+    """
+    if not cards:
+        return 0
+    quote_name = connection.ops.quote_name
+    columns = ", ".join(
+        quote_name(Card._meta.get_field(field_name).column)
+        for field_name in ("series", "number", "balance", "is_active",
+                           "status")
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {quote_name(Card._meta.db_table)} ({columns}) "
+            f"VALUES (%s, %s, %s, %s, %s) ON CONFLICT DO NOTHING",
+            cards,
+        )
+        return cursor.rowcount
+
+
+def import_cards(lines, chunk_size=None, progress_callback=None):
+    """
+    Imports pre-printed cards from CSV lines with IMPORT_FIELDS header.
+
+    Rows are processed in chunks of `chunk_size`, each in its own
+    transaction. Rejected rows are collected in returned stats.
+    """
+    if chunk_size is None:
+        chunk_size = settings.CARDS_IMPORT_CHUNK_SIZE
+
+    stats = ImportStats()
+    reader = csv.DictReader(lines)
+    rows = ((reader.line_num, row) for row in reader)
+    started = time.perf_counter()
+
+    while chunk := list(islice(rows, chunk_size)):
+        stats.rows_read += len(chunk)
+        import_cards_chunk(chunk, stats)
+        stats.elapsed = time.perf_counter() - started
+        if progress_callback is not None:
+            progress_callback(stats)
+
+    stats.elapsed = time.perf_counter() - started
+    return stats
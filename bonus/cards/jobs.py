@@ -0,0 +1,106 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .models import GenerationJob
+from .utils import generate_cards, reserve_card_numbers
+
+logger = logging.getLogger(__name__)
+
+
+def claim_next_job():
+    """
+    Moves the oldest pending job to RUNNING and returns it.
+
+    The claim is a conditional UPDATE, so concurrent workers never pick
+    up the same job.
+    """
+    while True:
+        job_id = (GenerationJob.objects
+                               .filter(status=GenerationJob.PENDING)
+                               .order_by("id")
+                               .values_list("pk", flat=True)
+                               .first())
+        if job_id is None:
+            return None
+        claimed = (GenerationJob.objects
+                                .filter(pk=job_id,
+                                        status=GenerationJob.PENDING)
+                                .update(status=GenerationJob.RUNNING,
+                                        started_date=timezone.now()))
+        if claimed:
+            return GenerationJob.objects.select_related("series").get(
+                pk=job_id
+            )
+
+
+def requeue_running_jobs():
+    return (GenerationJob.objects
+                         .filter(status=GenerationJob.RUNNING)
+                         .update(status=GenerationJob.PENDING))
+
+
+def run_job(job, batch_size=None):
+    cards_created = job.cards_created
+
+    def save_progress(stats):
+        (GenerationJob.objects
+                      .filter(pk=job.pk)
+                      .update(cards_created=cards_created
+                              + stats.cards_created))
+
+    try:
+        if job.first_number is None:
+            with transaction.atomic():
+                job.first_number = reserve_card_numbers(
+                    job.series, job.cards_count
+                )
+                job.save(update_fields=("first_number",))
+        generate_cards(
+            card_series=job.series,
+            cards_count=job.cards_count - cards_created,
+            batch_size=batch_size,
+            first_number=job.first_number + cards_created,
+            progress_callback=save_progress,
+        )
+    except Exception as error:
+        logger.exception("Generation job %s failed", job.pk)
+        (GenerationJob.objects
+                      .filter(pk=job.pk)
+                      .update(status=GenerationJob.FAILED,
+                              error=str(error),
+                              finished_date=timezone.now()))
+        return
+    (GenerationJob.objects
+                  .filter(pk=job.pk)
+                  .update(status=GenerationJob.DONE,
+                          finished_date=timezone.now()))
+
+
+def run_worker(batch_size=None, poll_interval=1.0, once=False):
+    try:
+        while True:
+            close_old_connections()
+            job = claim_next_job()
+            if job is not None:
+                run_job(job, batch_size=batch_size)
+                continue
+            if once:
+                return
+            time.sleep(poll_interval)
+    finally:
+        connection.close()
+
+
+def run_workers(workers_count, batch_size=None, poll_interval=1.0,
+                once=False):
+    with ThreadPoolExecutor(max_workers=workers_count) as executor:
+        futures = [
+            executor.submit(run_worker, batch_size, poll_interval, once)
+            for _ in range(workers_count)
+        ]
+        for future in futures:
+            future.result()
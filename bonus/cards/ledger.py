@@ -0,0 +1,383 @@
+import csv
+import json
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .cache import invalidate_cards
+from .codec import decode, decode_many
+from .models import TRANSACTION_MODELS, Card, Transaction
+from .series_stats import (apply_series_stats_deltas, get_transaction_deltas,
+                           new_deltas)
+
+TRANSACTION_RECORD_FIELDS = ("card", "amount", "description", "date_time")
+
+
+def get_digits_limit(field):
+    """
+    Returns exclusive limit of absolute values of a DecimalField.
+    """
+    return Decimal(10) ** (field.max_digits - field.decimal_places)
+
+
+AMOUNT_LIMIT = get_digits_limit(Transaction._meta.get_field("amount"))
+BALANCE_LIMIT = get_digits_limit(Card._meta.get_field("balance"))
+
+
+class LedgerError(Exception):
+    pass
+
+
+@dataclass
+class ReconciliationStats:
+    cards_checked: int = 0
+    cards_fixed: int = 0
+    mismatches: list = field(default_factory=list)
+    elapsed: float = 0.0
+
+
+def post_transaction(card_id, amount, description, date_time=None):
+    """
+    Records a transaction and applies it to card balance atomically.
+
+    The card row is locked for the duration, and the balance is changed
+    with an F() expression, so concurrent postings never lose updates.
+    """
+    amount = Decimal(amount)
+    check_amount(amount)
+    if date_time is None:
+        date_time = timezone.now()
+
+    with transaction.atomic():
+        try:
+            card = (Card.objects
+                        .select_for_update(of=("self",))
+                        .select_related("series")
+                        .get(pk=card_id))
+        except Card.DoesNotExist:
+            raise LedgerError(f"Card {card_id} not found.")
+        if card.actual_status != Card.ACTIVATED:
+            raise LedgerError(f"{card} is not active.")
+        check_balance(card.balance + amount)
+
+        new_transaction = Transaction.objects.create(
+            card=card,
+            amount=amount,
+            date_time=date_time,
+            description=description,
+        )
+        Card.objects.filter(pk=card.pk).update(
+            balance=F("balance") + amount,
+            last_used_date=Coalesce(
+                Greatest("last_used_date", Value(date_time)),
+                Value(date_time),
+            ),
+        )
+        invalidate_cards((card.pk,))
+        apply_series_stats_deltas(
+            get_transaction_deltas(((card.series_id, amount),))
+        )
+    return new_transaction
+
+
+def check_amount(amount):
+    if not amount.is_finite():
+        raise LedgerError("Incorrect amount.")
+    if not amount:
+        raise LedgerError("Zero amount transaction disallowed.")
+    if abs(amount) >= AMOUNT_LIMIT:
+        raise LedgerError("Amount is too large.")
+
+
+def check_balance(balance):
+    if balance < 0:
+        raise LedgerError("Balance can not be negative.")
+    if balance >= BALANCE_LIMIT:
+        raise LedgerError("Balance is too large.")
+
+
+def reconcile_balances(chunk_size=None, fix=False, progress_callback=None):
+    """
+    Compares card balances with the sum of their transactions.
+
+    Cards are walked in primary key order, `chunk_size` at a time, and
+    every chunk is checked with a grouped aggregate over hot and archived
+    transactions.
+    With `fix` the chunk is locked and mismatching balances are rewritten.
+    """
+    if chunk_size is None:
+        chunk_size = settings.CARDS_RECONCILE_CHUNK_SIZE
+
+    stats = ReconciliationStats()
+    last_card_id = 0
+    started = time.perf_counter()
+
+    while True:
+        with transaction.atomic():
+            cards = Card.objects.filter(pk__gt=last_card_id).order_by("pk")
+            if fix:
+                cards = cards.select_for_update()
+            balances = dict(cards.values_list("pk", "balance")[:chunk_size])
+            if not balances:
+                break
+            last_card_id = max(balances)
+            totals = Counter()
+            for model in TRANSACTION_MODELS:
+                totals.update(dict(
+                    model.objects
+                         .filter(card_id__in=list(balances))
+                         .values("card_id")
+                         .annotate(total=Sum("amount"))
+                         .order_by()
+                         .values_list("card_id", "total")
+                ))
+            fixed_balances = {}
+            for card_id, balance in balances.items():
+                expected_balance = totals.get(card_id, Decimal(0))
+                if balance == expected_balance:
+                    continue
+                stats.mismatches.append((card_id, balance, expected_balance))
+                if fix:
+                    (Card.objects
+                         .filter(pk=card_id)
+                         .update(balance=expected_balance))
+                    invalidate_cards((card_id,))
+                    fixed_balances[card_id] = expected_balance - balance
+                    stats.cards_fixed += 1
+            if fixed_balances:
+                deltas = new_deltas()
+                for series_id, card_id in (Card.objects
+                                               .filter(pk__in=fixed_balances)
+                                               .values_list("series_id",
+                                                            "pk")):
+                    deltas[series_id]["total_balance"] += (
+                        fixed_balances[card_id]
+                    )
+                apply_series_stats_deltas(deltas)
+        stats.cards_checked += len(balances)
+        stats.elapsed = time.perf_counter() - started
+        if progress_callback is not None:
+            progress_callback(stats)
+
+    stats.elapsed = time.perf_counter() - started
+    return stats
+
+
+def iter_transaction_records(lines, data_format="jsonl"):
+    """
+    Yields `(line_number, record)` pairs from JSON lines or CSV text lines.
+
+    CSV input should have a header row with `TRANSACTION_RECORD_FIELDS`
+    columns. Unparsable lines are yielded with `None` record.
+    """
+    if data_format == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        if not isinstance(record, dict):
+            record = None
+        yield line_number, record
+
+
+def decode_record_cards(records):
+    """
+    Returns `{line_number: (series, number)}` card numbers of `records`.
+
+    The batch is decoded at once with decode_many(). If some number is
+    incorrect, an empty mapping is returned and records are decoded one
+    by one to report their errors.
+    """
+    records = [(line_number, record) for line_number, record in records
+               if record is not None]
+    try:
+        card_keys = decode_many([str(record.get("card", ""))
+                                 for _, record in records])
+    except ValueError:
+        return {}
+    return dict(zip((line_number for line_number, _ in records), card_keys))
+
+
+def clean_transaction_record(record, card_key=None):
+    if record is None:
+        raise LedgerError("Malformed line.")
+    if card_key is None:
+        try:
+            card_key = decode(str(record.get("card", "")))
+        except ValueError as error:
+            raise LedgerError(str(error))
+    try:
+        amount = Decimal(str(record.get("amount", ""))).quantize(
+            Decimal("0.01")
+        )
+    except InvalidOperation:
+        raise LedgerError("Incorrect amount.")
+    check_amount(amount)
+    description = str(record.get("description") or "")
+    if len(description) > 100:
+        raise LedgerError("Description is too long.")
+    date_time = timezone.now()
+    if record.get("date_time"):
+        try:
+            date_time = parse_datetime(str(record["date_time"]))
+        except ValueError:
+            date_time = None
+        if date_time is None:
+            raise LedgerError("Incorrect date_time.")
+        if timezone.is_naive(date_time):
+            date_time = timezone.make_aware(date_time)
+    return {
+        "card": card_key,
+        "amount": amount,
+        "description": description,
+        "date_time": date_time,
+    }
+
+
+def get_card_keys_query(card_keys):
+    """
+    Returns a query matching exactly the `(series_id, number)` pairs.
+
+    Numbers are grouped per series, so cards with a number of the batch
+    in another series of the batch are neither fetched nor locked.
+    """
+    numbers = defaultdict(set)
+    for series_id, number in card_keys:
+        numbers[series_id].add(number)
+    query = Q()
+    for series_id in sorted(numbers):
+        query |= Q(series_id=series_id, number__in=sorted(numbers[series_id]))
+    return query
+
+
+def post_transactions_batch(records):
+    """
+    Posts a batch of `(line_number, record)` transaction records.
+
+    Card numbers are decoded with decode_many(), cards are resolved and
+    locked with one query, every record is checked against the running
+    card balance, accepted transactions are inserted with one bulk_create
+    and card balances are moved with one UPDATE.
+    Returns per-line results in input order.
+    """
+    results = {}
+    cleaned_records = []
+    card_keys = decode_record_cards(records)
+    for line_number, record in records:
+        try:
+            cleaned_records.append((line_number, clean_transaction_record(
+                record, card_keys.get(line_number),
+            )))
+        except LedgerError as error:
+            results[line_number] = {
+                "line": line_number, "status": "error", "error": str(error),
+            }
+
+    with transaction.atomic():
+        card_keys = {record["card"] for _, record in cleaned_records}
+        cards = {}
+        if card_keys:
+            cards = {
+                (card.series_id, card.number): card
+                for card in (Card.objects
+                                 .select_for_update(of=("self",))
+                                 .select_related("series")
+                                 .filter(get_card_keys_query(card_keys)))
+            }
+
+        balances = {}
+        last_used_dates = {}
+        accepted = []
+        for line_number, record in cleaned_records:
+            card = cards.get(record["card"])
+            error = None
+            if card is None:
+                error = "Card not found."
+            elif card.actual_status != Card.ACTIVATED:
+                error = f"{card} is not active."
+            else:
+                balance = balances.get(card.pk, card.balance)
+                try:
+                    check_balance(balance + record["amount"])
+                except LedgerError as ledger_error:
+                    error = str(ledger_error)
+            if error is not None:
+                results[line_number] = {
+                    "line": line_number, "status": "error", "error": error,
+                }
+                continue
+            balances[card.pk] = balance + record["amount"]
+            last_used_dates[card.pk] = max(
+                filter(None, (card.last_used_date,
+                              last_used_dates.get(card.pk),
+                              record["date_time"]))
+            )
+            accepted.append((line_number, Transaction(
+                card=card,
+                amount=record["amount"],
+                date_time=record["date_time"],
+                description=record["description"],
+            )))
+
+        Transaction.objects.bulk_create(
+            [new_transaction for _, new_transaction in accepted]
+        )
+        if balances:
+            deltas = {
+                card.pk: balances[card.pk] - card.balance
+                for card in cards.values() if card.pk in balances
+            }
+            Card.objects.filter(pk__in=list(balances)).update(
+                balance=F("balance") + Case(
+                    *(When(pk=card_id, then=Value(delta))
+                      for card_id, delta in deltas.items()),
+                    output_field=DecimalField(),
+                ),
+                last_used_date=Case(
+                    *(When(pk=card_id, then=Value(date_time))
+                      for card_id, date_time in last_used_dates.items()),
+                ),
+            )
+            invalidate_cards(balances)
+        apply_series_stats_deltas(get_transaction_deltas(
+            (new_transaction.card.series_id, new_transaction.amount)
+            for _, new_transaction in accepted
+        ))
+
+    for line_number, new_transaction in accepted:
+        results[line_number] = {
+            "line": line_number,
+            "status": "ok",
+            "transaction": new_transaction.pk,
+        }
+    return [results[line_number] for line_number in sorted(results)]
+
+
+def ingest_transactions(lines, data_format="jsonl", batch_size=None):
+    """
+    Posts transactions from a stream of text lines batch by batch.
+
+    Yields per-line results of every posted batch, so arbitrarily long
+    streams are processed in constant memory.
+    """
+    if batch_size is None:
+        batch_size = settings.CARDS_INGEST_BATCH_SIZE
+    records = iter_transaction_records(lines, data_format)
+    while batch := list(islice(records, batch_size)):
+        yield from post_transactions_batch(batch)
@@ -0,0 +1,51 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from cards.archive import archive_transactions
+
+
+class Command(BaseCommand):
+    help = (
+        "Move old transactions and transactions of outdated cards into "
+        "archive"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.CARDS_ARCHIVE_AFTER_DAYS,
+            help="Archive transactions older than this days count",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=settings.CARDS_ARCHIVE_CHUNK_SIZE,
+            help="Transactions count moved per transaction",
+        )
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("Chunk size should be positive.")
+        if options["days"] < 0:
+            raise CommandError("Days count can not be negative.")
+
+        stats = archive_transactions(
+            older_than=timezone.now() - timedelta(days=options["days"]),
+            chunk_size=options["chunk_size"],
+            progress_callback=self.report_progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {stats.transactions_archived} transactions "
+            f"in {stats.elapsed:.2f}s, "
+            f"{stats.rows_per_second:.0f} rows/sec"
+        ))
+
+    def report_progress(self, stats):
+        self.stdout.write(
+            f"Archived {stats.transactions_archived} transactions "
+            f"up to id {stats.last_id}"
+        )
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from cards.benchmarks import benchmark_balance_checks
+
+
+class Command(BaseCommand):
+    help = "Compare sync WSGI and async ASGI balance checks under load"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--samples",
+            type=int,
+            default=2000,
+            help="Random cards count to check balance of",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=50,
+            help="Concurrent clients count",
+        )
+
+    def handle(self, *args, **options):
+        if options["samples"] < 1 or options["concurrency"] < 1:
+            raise CommandError(
+                "Samples and concurrency should be positive."
+            )
+
+        results = benchmark_balance_checks(
+            samples=options["samples"],
+            concurrency=options["concurrency"],
+        )
+        if results is None:
+            raise CommandError("No cards to check balance of.")
+        for name, result in results.items():
+            self.stdout.write(self.style.SUCCESS(
+                f"{name}: {result['requests']} requests, "
+                f"{result['errors']} errors, "
+                f"{result['requests_per_second']:.0f} req/sec, "
+                f"p50 {result['p50_ms']:.2f} ms, "
+                f"p95 {result['p95_ms']:.2f} ms, "
+                f"p99 {result['p99_ms']:.2f} ms"
+            ))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from cards.benchmarks import benchmark_card_codec
+
+
+class Command(BaseCommand):
+    help = "Measure card number encoding and decoding throughput"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--count",
+            type=int,
+            default=1000000,
+            help="Card numbers count to encode and decode",
+        )
+        parser.add_argument(
+            "--series",
+            type=int,
+            default=100,
+            help="Distinct card series count of the numbers",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=42,
+            help="Random seed of the numbers",
+        )
+
+    def handle(self, *args, **options):
+        if options["count"] < 1:
+            raise CommandError("Count should be positive.")
+        if not 1 <= options["series"] < 100000:
+            raise CommandError("Series count should be from 1 to 99999.")
+
+        results = benchmark_card_codec(
+            count=options["count"],
+            series_count=options["series"],
+            seed=options["seed"],
+        )
+        for name, result in results.items():
+            self.stdout.write(self.style.SUCCESS(
+                f"{name}: {result['numbers']} numbers "
+                f"in {result['elapsed']:.2f}s, "
+                f"{result['numbers_per_second']:.0f} numbers/sec"
+            ))
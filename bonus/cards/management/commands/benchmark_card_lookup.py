@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from cards.benchmarks import benchmark_card_lookup
+
+
+class Command(BaseCommand):
+    help = "Measure card lookup latency by printable number"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--samples",
+            type=int,
+            default=1000,
+            help="Random cards count to resolve",
+        )
+
+    def handle(self, *args, **options):
+        if options["samples"] < 1:
+            raise CommandError("Samples count should be positive.")
+
+        result = benchmark_card_lookup(options["samples"])
+        if result is None:
+            raise CommandError("No cards to look up.")
+        self.stdout.write(result["plan"])
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['lookups']} lookups, "
+            f"{result['queries_per_lookup']:.1f} queries per lookup, "
+            f"p50 {result['p50_ms']:.3f} ms, "
+            f"p95 {result['p95_ms']:.3f} ms, "
+            f"p99 {result['p99_ms']:.3f} ms"
+        ))
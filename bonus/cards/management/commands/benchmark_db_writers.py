@@ -0,0 +1,82 @@
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_databases, teardown_databases
+
+from cards.benchmarks import (SQLITE_DEFAULT_SETTINGS,
+                              benchmark_concurrent_writers, seed_writer_cards)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark concurrent transaction posting on a throwaway test "
+        "database with default and configured connection settings"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--writers",
+            type=int,
+            default=8,
+            help="Concurrent writer threads count",
+        )
+        parser.add_argument(
+            "--transactions",
+            type=int,
+            default=200,
+            help="Transactions count posted by every writer",
+        )
+        parser.add_argument(
+            "--cards-per-writer",
+            type=int,
+            default=10,
+            help="Cards count every writer posts to",
+        )
+
+    def handle(self, *args, **options):
+        for option in ("writers", "transactions", "cards_per_writer"):
+            if options[option] < 1:
+                raise CommandError(f"{option} should be positive.")
+
+        profiles = {"configured": None}
+        test_settings = connection.settings_dict["TEST"]
+        old_test_name = test_settings["NAME"]
+        if connection.vendor == "sqlite":
+            profiles = {
+                "default": SQLITE_DEFAULT_SETTINGS,
+                "configured": None,
+            }
+            # threads can not share in-memory test database
+            test_settings["NAME"] = os.path.join(
+                tempfile.mkdtemp(), "benchmark_db_writers.sqlite3"
+            )
+
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            card_ids = seed_writer_cards(
+                options["writers"] * options["cards_per_writer"]
+            )
+            results = {
+                name: benchmark_concurrent_writers(
+                    card_ids,
+                    options["writers"],
+                    options["transactions"],
+                    overrides=overrides,
+                )
+                for name, overrides in profiles.items()
+            }
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            test_settings["NAME"] = old_test_name
+
+        for name, result in results.items():
+            self.stdout.write(self.style.SUCCESS(
+                f"{name}: {result['requests']} transactions, "
+                f"{result['errors']} errors, "
+                f"{result['requests_per_second']:.0f} tx/sec, "
+                f"p50 {result['p50_ms']:.2f} ms, "
+                f"p95 {result['p95_ms']:.2f} ms, "
+                f"p99 {result['p99_ms']:.2f} ms"
+            ))
@@ -0,0 +1,83 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_databases, teardown_databases
+
+from cards.benchmarks import benchmark_search_combinations, seed_cards
+
+
+class Command(BaseCommand):
+    help = "Check that card search filter combinations are served by indexes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--seed-series",
+            type=int,
+            default=0,
+            help=(
+                "Benchmark a throwaway test database seeded with this many "
+                "card series instead of the configured one"
+            ),
+        )
+        parser.add_argument(
+            "--cards-per-series",
+            type=int,
+            default=100000,
+            help="Cards count generated in every seeded series",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Timed runs per filter combination",
+        )
+        parser.add_argument(
+            "--analyze",
+            action="store_true",
+            help="Refresh planner statistics before benchmarking",
+        )
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1:
+            raise CommandError("Repeat count should be positive.")
+        if options["cards_per_series"] < 1:
+            raise CommandError("cards_per_series should be positive.")
+
+        if not options["seed_series"]:
+            self.benchmark(options)
+            return
+        # seeded cards go to a throwaway test database, never to the
+        # configured one
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            self.stdout.write(
+                f"Seeding {options['seed_series']} series "
+                f"of {options['cards_per_series']} cards "
+                f"into a test database"
+            )
+            seed_cards(options["seed_series"], options["cards_per_series"])
+            self.benchmark(options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+    def benchmark(self, options):
+        if options["analyze"]:
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+        failed = 0
+        for result in benchmark_search_combinations(options["repeat"]):
+            timing = result["count"]
+            line = (
+                f"{' + '.join(result['filters'])}: "
+                f"p50 {timing['p50_ms']:.2f} ms, "
+                f"p95 {timing['p95_ms']:.2f} ms"
+            )
+            if result["uses_index"]:
+                self.stdout.write(self.style.SUCCESS(f"[index] {line}"))
+                continue
+            failed += 1
+            self.stdout.write(self.style.ERROR(
+                f"[full scan of {', '.join(result['full_scans'])}] {line}"
+            ))
+        if failed:
+            raise CommandError(f"{failed} combinations scan cards table.")
@@ -0,0 +1,82 @@
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from cards.export import iter_export
+from cards.forms import CardExportForm
+
+
+class Command(BaseCommand):
+    help = "Export cards or transactions as CSV or JSON lines"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "model_name",
+            choices=("cards", "transactions"),
+            help="Data to export",
+        )
+        parser.add_argument(
+            "--format",
+            choices=[choice for choice, _ in CardExportForm.EXPORT_FORMATS],
+            default=CardExportForm.CSV,
+            help="Export format",
+        )
+        parser.add_argument(
+            "--gzip",
+            action="store_true",
+            help="Compress export with gzip",
+        )
+        parser.add_argument(
+            "--output",
+            default="-",
+            help="Output file path, '-' for standard output",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=settings.CARDS_EXPORT_CHUNK_SIZE,
+            help="Rows fetched from database at once",
+        )
+        parser.add_argument(
+            "--filter",
+            action="append",
+            default=[],
+            metavar="FIELD=VALUE",
+            help="Card search condition, e.g. series__gte=2",
+        )
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("Chunk size should be positive.")
+        form_data = {}
+        for search_filter in options["filter"]:
+            field, separator, value = search_filter.partition("=")
+            if not separator:
+                raise CommandError(f"Incorrect filter: {search_filter}")
+            form_data[field] = value
+        form = CardExportForm(form_data)
+        if not form.is_valid():
+            raise CommandError(form.errors.as_text())
+
+        chunks = iter_export(
+            options["model_name"],
+            search_query_params=form.get_search_query_params(),
+            data_format=options["format"],
+            compress=options["gzip"],
+            chunk_size=options["chunk_size"],
+        )
+        if options["output"] == "-":
+            self.write(sys.stdout.buffer, chunks)
+            return
+        try:
+            with open(options["output"], "wb") as output:
+                self.write(output, chunks)
+        except OSError as error:
+            raise CommandError(error)
+
+    def write(self, output, chunks):
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            output.write(chunk)
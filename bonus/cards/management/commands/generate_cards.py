@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from cards.codec import encode
+from cards.models import CardSeries
+from cards.utils import generate_cards
+
+
+class Command(BaseCommand):
+    help = "Generate cards for card series in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("series", type=int, help="Card series ID")
+        parser.add_argument("count", type=int, help="Cards count")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.CARDS_GENERATION_BATCH_SIZE,
+            help="Cards count per committed batch",
+        )
+        parser.add_argument(
+            "--first-number",
+            type=int,
+            default=None,
+            help="Fill already reserved numbers starting from this one",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            card_series = CardSeries.objects.get(pk=options["series"])
+        except CardSeries.DoesNotExist:
+            raise CommandError(f"Card series {options['series']} not found.")
+        if options["count"] < 1:
+            raise CommandError("Minimum card count to generate is 1.")
+        if options["batch_size"] < 1:
+            raise CommandError("Batch size should be positive.")
+
+        try:
+            stats = generate_cards(
+                card_series=card_series,
+                cards_count=options["count"],
+                batch_size=options["batch_size"],
+                first_number=options["first_number"],
+                progress_callback=self.report_progress,
+            )
+        except ValueError as error:
+            raise CommandError(str(error))
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {stats.cards_created} cards "
+            f"({encode(card_series.pk, stats.first_number)}.."
+            f"{encode(card_series.pk, stats.last_number)}) "
+            f"in {stats.elapsed:.2f}s, "
+            f"{stats.cards_per_second:.0f} cards/sec, "
+            f"peak RSS {stats.peak_rss_kb} KB"
+        ))
+
+    def report_progress(self, stats):
+        self.stdout.write(
+            f"Committed up to number {stats.last_number}: "
+            f"{stats.cards_created} cards, "
+            f"{stats.cards_per_second:.0f} cards/sec, "
+            f"peak RSS {stats.peak_rss_kb} KB"
+        )
@@ -0,0 +1,71 @@
+import csv
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from cards.importer import import_cards
+
+
+class Command(BaseCommand):
+    help = "Import pre-printed cards from CSV file"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            help="Path to CSV file with series,number,balance,is_active "
+                 "columns, '-' for standard input",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=settings.CARDS_IMPORT_CHUNK_SIZE,
+            help="Rows count imported per transaction",
+        )
+        parser.add_argument(
+            "--rejected",
+            default=None,
+            help="Write rejected rows report to this CSV file",
+        )
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("Chunk size should be positive.")
+
+        try:
+            if options["path"] == "-":
+                stats = self.import_cards(sys.stdin, options)
+            else:
+                with open(options["path"], encoding="utf-8",
+                          newline="") as lines:
+                    stats = self.import_cards(lines, options)
+            if options["rejected"]:
+                with open(options["rejected"], "w", encoding="utf-8",
+                          newline="") as report:
+                    writer = csv.writer(report)
+                    writer.writerow(("line", "error"))
+                    writer.writerows(stats.rejected)
+        except OSError as error:
+            raise CommandError(error)
+
+        if not options["rejected"]:
+            for line_number, error in stats.rejected:
+                self.stdout.write(self.style.WARNING(
+                    f"Line {line_number}: {error}"
+                ))
+        self.stdout.write(self.style.SUCCESS(
+            f"Read {stats.rows_read} rows in {stats.elapsed:.2f}s, "
+            f"{stats.rows_per_second:.0f} rows/sec: "
+            f"{stats.cards_created} cards created, "
+            f"{len(stats.rejected)} rejected"
+        ))
+
+    def import_cards(self, lines, options):
+        return import_cards(
+            lines,
+            chunk_size=options["chunk_size"],
+            progress_callback=self.report_progress,
+        )
+
+    def report_progress(self, stats):
+        self.stdout.write(f"Imported {stats.rows_read} rows")
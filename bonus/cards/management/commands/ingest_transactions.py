@@ -0,0 +1,59 @@
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from cards.ledger import ingest_transactions
+
+
+class Command(BaseCommand):
+    help = "Post transactions from JSON lines or CSV file"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            help="Path to transactions file, '-' for standard input",
+        )
+        parser.add_argument(
+            "--format",
+            choices=("jsonl", "csv"),
+            default="jsonl",
+            help="Transactions file format",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.CARDS_INGEST_BATCH_SIZE,
+            help="Transactions count posted per transaction",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("Batch size should be positive.")
+
+        if options["path"] == "-":
+            self.ingest(sys.stdin, options)
+            return
+        try:
+            with open(options["path"], encoding="utf-8", newline="") as lines:
+                self.ingest(lines, options)
+        except OSError as error:
+            raise CommandError(error)
+
+    def ingest(self, lines, options):
+        posted = rejected = 0
+        for result in ingest_transactions(
+            lines,
+            data_format=options["format"],
+            batch_size=options["batch_size"],
+        ):
+            if result["status"] == "ok":
+                posted += 1
+                continue
+            rejected += 1
+            self.stdout.write(self.style.WARNING(
+                f"Line {result['line']}: {result['error']}"
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f"Posted {posted} transactions, rejected {rejected}"
+        ))
@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from cards.bulk import purge_expired_series
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired card series with their cards and transactions in "
+        "chunks"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--expired-days",
+            type=int,
+            default=0,
+            help="Purge only series expired at least this days count ago",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=settings.CARDS_BULK_CHUNK_SIZE,
+            help="Cards or transactions count deleted per transaction",
+        )
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("Chunk size should be positive.")
+        if options["expired_days"] < 0:
+            raise CommandError("Days count can not be negative.")
+
+        stats = purge_expired_series(
+            expired_before=(timezone.now()
+                            - timedelta(days=options["expired_days"])),
+            chunk_size=options["chunk_size"],
+            progress_callback=self.report_progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Purged {stats.series_deleted} series with "
+            f"{stats.cards_affected} cards and "
+            f"{stats.transactions_deleted} transactions "
+            f"in {stats.elapsed:.2f}s, "
+            f"{stats.rows_per_second:.0f} rows/sec"
+        ))
+
+    def report_progress(self, stats):
+        self.stdout.write(
+            f"Deleted {stats.cards_affected} cards, "
+            f"{stats.transactions_deleted} transactions, "
+            f"{stats.rows_per_second:.0f} rows/sec"
+        )
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from cards.series_stats import rebuild_series_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute per-series statistics from cards and transactions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--series",
+            type=int,
+            nargs="+",
+            help="IDs of card series to rebuild, all series by default",
+        )
+
+    def handle(self, *args, **options):
+        stats = rebuild_series_stats(series_ids=options["series"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt statistics of {stats.series_rebuilt} series "
+            f"in {stats.elapsed:.2f}s, {stats.series_drifted} drifted"
+        ))
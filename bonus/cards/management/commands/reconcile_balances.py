@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from cards.ledger import reconcile_balances
+
+
+class Command(BaseCommand):
+    help = "Check card balances against their transaction history"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=settings.CARDS_RECONCILE_CHUNK_SIZE,
+            help="Cards count checked per aggregate query",
+        )
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Rewrite mismatching balances",
+        )
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("Chunk size should be positive.")
+
+        stats = reconcile_balances(
+            chunk_size=options["chunk_size"],
+            fix=options["fix"],
+            progress_callback=self.report_progress,
+        )
+        for card_id, balance, expected_balance in stats.mismatches:
+            self.stdout.write(self.style.WARNING(
+                f"Card {card_id}: balance {balance}, "
+                f"transactions total {expected_balance}"
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {stats.cards_checked} cards in {stats.elapsed:.2f}s, "
+            f"{len(stats.mismatches)} mismatches, "
+            f"{stats.cards_fixed} fixed"
+        ))
+
+    def report_progress(self, stats):
+        self.stdout.write(f"Checked {stats.cards_checked} cards")
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from cards.rollups import reset_transaction_rollups, roll_up_transactions
+
+
+class Command(BaseCommand):
+    help = "Roll new transactions up into hourly and daily buckets"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=settings.CARDS_ROLLUP_CHUNK_SIZE,
+            help="Transactions count rolled up per transaction",
+        )
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Drop rollups and roll up all transactions again",
+        )
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("Chunk size should be positive.")
+
+        if options["rebuild"]:
+            reset_transaction_rollups()
+        stats = roll_up_transactions(
+            chunk_size=options["chunk_size"],
+            progress_callback=self.report_progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Rolled up {stats.transactions_rolled} transactions "
+            f"into {stats.buckets_updated} buckets "
+            f"in {stats.elapsed:.2f}s, "
+            f"{stats.rows_per_second:.0f} rows/sec"
+        ))
+
+    def report_progress(self, stats):
+        self.stdout.write(
+            f"Rolled up {stats.transactions_rolled} transactions "
+            f"up to id {stats.last_id}"
+        )
@@ -0,0 +1,156 @@
+import json
+import platform
+import subprocess
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_databases, teardown_databases
+from django.utils import timezone
+
+from cards.benchmarks import (compare_reports, run_benchmark_suite,
+                              seed_benchmark_data)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database, benchmark card operations and "
+        "write a JSON report"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--series",
+            type=int,
+            default=5,
+            help="Seeded card series count",
+        )
+        parser.add_argument(
+            "--cards-per-series",
+            type=int,
+            default=20000,
+            help="Seeded cards count per series",
+        )
+        parser.add_argument(
+            "--transactions-per-card",
+            type=int,
+            default=2,
+            help="Seeded transactions count per active card",
+        )
+        parser.add_argument(
+            "--samples",
+            type=int,
+            default=200,
+            help="Measured calls count per scenario",
+        )
+        parser.add_argument(
+            "--generate-count",
+            type=int,
+            default=1000,
+            help="Cards count generated per generate_cards call",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=42,
+            help="Random seed of seeded data and sampled cards",
+        )
+        parser.add_argument(
+            "--scenario",
+            help="Run only scenarios starting with this name",
+        )
+        parser.add_argument(
+            "--output",
+            default="benchmark_report.json",
+            help="Report file path",
+        )
+        parser.add_argument(
+            "--compare",
+            metavar="BASELINE",
+            help="Baseline report to compare p95 latencies with",
+        )
+
+    def handle(self, *args, **options):
+        for option in ("series", "cards_per_series", "samples",
+                       "generate_count"):
+            if options[option] < 1:
+                raise CommandError(f"{option} should be positive.")
+        if options["transactions_per_card"] < 0:
+            raise CommandError("transactions_per_card can not be negative.")
+
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            seed_benchmark_data(
+                options["series"],
+                options["cards_per_series"],
+                options["transactions_per_card"],
+                seed=options["seed"],
+            )
+            scenarios = run_benchmark_suite(
+                samples=options["samples"],
+                generate_count=options["generate_count"],
+                scenario=options["scenario"],
+            )
+            vendor = connection.vendor
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+        report = {
+            "meta": {
+                "created": timezone.now().isoformat(),
+                "commit": self.get_commit(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": vendor,
+                "seed": options["seed"],
+                "series": options["series"],
+                "cards_per_series": options["cards_per_series"],
+                "transactions_per_card": options["transactions_per_card"],
+                "samples": options["samples"],
+            },
+            "scenarios": scenarios,
+        }
+        with open(options["output"], "w") as report_file:
+            json.dump(report, report_file, indent=2, sort_keys=True)
+
+        for name, result in scenarios.items():
+            self.stdout.write(
+                f"{name}: p50 {result['p50_ms']:.2f} ms, "
+                f"p95 {result['p95_ms']:.2f} ms, "
+                f"p99 {result['p99_ms']:.2f} ms, "
+                f"{result['queries']:.1f} queries, "
+                f"peak {result['peak_memory_kb']} KB"
+            )
+        if options["compare"]:
+            self.write_comparison(report, options["compare"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Report with {len(scenarios)} scenarios "
+            f"written to {options['output']}"
+        ))
+
+    def write_comparison(self, report, baseline_path):
+        try:
+            with open(baseline_path) as baseline_file:
+                baseline_report = json.load(baseline_file)
+        except (OSError, ValueError) as error:
+            raise CommandError(f"Can not read baseline report: {error}")
+        for name, baseline, current, change in compare_reports(
+            report, baseline_report
+        ):
+            style = self.style.WARNING if change > 0.1 else self.style.NOTICE
+            self.stdout.write(style(
+                f"{name}: p95 {baseline:.2f} -> {current:.2f} ms "
+                f"({change:+.0%})"
+            ))
+
+    def get_commit(self):
+        try:
+            result = subprocess.run(
+                ("git", "rev-parse", "--short", "HEAD"),
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        return result.stdout.strip()
@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from cards.jobs import requeue_running_jobs, run_workers
+
+
+class Command(BaseCommand):
+    help = "Process queued card generation jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Worker threads count",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.CARDS_GENERATION_BATCH_SIZE,
+            help="Cards count per committed batch",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait for new jobs when queue is empty",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit when queue is empty",
+        )
+        parser.add_argument(
+            "--requeue-running",
+            action="store_true",
+            help="Resume jobs left running by a stopped worker",
+        )
+
+    def handle(self, *args, **options):
+        if options["workers"] < 1:
+            raise CommandError("Workers count should be positive.")
+        if options["batch_size"] < 1:
+            raise CommandError("Batch size should be positive.")
+
+        if options["requeue_running"]:
+            requeued = requeue_running_jobs()
+            self.stdout.write(f"Requeued {requeued} running jobs")
+
+        run_workers(
+            workers_count=options["workers"],
+            batch_size=options["batch_size"],
+            poll_interval=options["poll_interval"],
+            once=options["once"],
+        )
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from cards.utils import sweep_outdated_cards
+
+
+class Command(BaseCommand):
+    help = "Mark cards of expired card series as outdated"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.CARDS_SWEEP_BATCH_SIZE,
+            help="Cards count updated per transaction",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("Batch size should be positive.")
+
+        stats = sweep_outdated_cards(
+            batch_size=options["batch_size"],
+            progress_callback=self.report_progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Marked {stats.cards_updated} cards outdated "
+            f"in {stats.series_swept} expired series "
+            f"in {stats.elapsed:.2f}s, "
+            f"{stats.rows_per_second:.0f} rows/sec"
+        ))
+
+    def report_progress(self, stats):
+        self.stdout.write(
+            f"Updated {stats.cards_updated} cards, "
+            f"{stats.rows_per_second:.0f} rows/sec"
+        )
@@ -0,0 +1,170 @@
+import logging
+import threading
+import time
+
+from asgiref.sync import (iscoroutinefunction, markcoroutinefunction,
+                          sync_to_async)
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_sql = ""
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.count += 1
+            self.total_time += duration
+            if duration >= self.slowest_time:
+                self.slowest_time = duration
+                self.slowest_sql = sql
+
+
+class QueryStatsRegistry:
+    """
+    Thread-safe per view name aggregate of recorded queries.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, view_name, recorder):
+        with self._lock:
+            stats = self._stats.setdefault(view_name, {
+                "requests": 0,
+                "queries": 0,
+                "db_time_ms": 0.0,
+                "max_queries": 0,
+                "slowest_query_ms": 0.0,
+                "slowest_query": "",
+            })
+            stats["requests"] += 1
+            stats["queries"] += recorder.count
+            stats["db_time_ms"] += recorder.total_time * 1000
+            stats["max_queries"] = max(stats["max_queries"], recorder.count)
+            if recorder.slowest_time * 1000 >= stats["slowest_query_ms"]:
+                stats["slowest_query_ms"] = recorder.slowest_time * 1000
+                stats["slowest_query"] = recorder.slowest_sql
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                view_name: {
+                    **stats,
+                    "avg_queries": stats["queries"] / stats["requests"],
+                    "avg_db_time_ms": stats["db_time_ms"] / stats["requests"],
+                }
+                for view_name, stats in self._stats.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+query_stats = QueryStatsRegistry()
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Records query count, DB time and slowest query of `cards` views.
+
+    Figures are returned in X-DB-* response headers, logged and aggregated
+    in `query_stats`. Queries of streaming responses are counted until
+    their content is exhausted, without headers. Requests over
+    CARDS_QUERY_BUDGETS are logged, or raise QueryBudgetExceeded with
+    CARDS_QUERY_BUDGET_STRICT enabled.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            # async views should not be adapted to sync ones by this
+            # middleware, see django.utils.deprecation.MiddlewareMixin
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        return self.process_queries(request, response, recorder)
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        # connections are thread critical, so the recorder is installed on
+        # the connection of the thread running ORM calls of the request
+        await sync_to_async(
+            lambda: connection.execute_wrappers.append(recorder)
+        )()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(
+                lambda: connection.execute_wrappers.remove(recorder)
+            )()
+        return self.process_queries(request, response, recorder)
+
+    def process_queries(self, request, response, recorder):
+        match = request.resolver_match
+        if match is None or match.namespace != "cards":
+            return response
+
+        if response.streaming:
+            # streamed content runs its queries after the view returns, so
+            # they are recorded once the content is exhausted, and no
+            # X-DB-* headers are sent
+            response.streaming_content = self.iter_streaming_content(
+                match.view_name, response.streaming_content, recorder,
+            )
+            return response
+        response["X-DB-Query-Count"] = recorder.count
+        response["X-DB-Time-Ms"] = f"{recorder.total_time * 1000:.2f}"
+        response["X-DB-Slowest-Ms"] = f"{recorder.slowest_time * 1000:.2f}"
+        self.record_queries(match.view_name, recorder)
+        return response
+
+    def iter_streaming_content(self, view_name, streaming_content, recorder):
+        try:
+            with connection.execute_wrapper(recorder):
+                yield from streaming_content
+        finally:
+            self.record_queries(view_name, recorder)
+
+    def record_queries(self, view_name, recorder):
+        query_stats.record(view_name, recorder)
+        logger.info(
+            "%s: %d queries, %.2f ms total, %.2f ms slowest",
+            view_name,
+            recorder.count,
+            recorder.total_time * 1000,
+            recorder.slowest_time * 1000,
+        )
+
+        budget = settings.CARDS_QUERY_BUDGETS.get(view_name)
+        if budget is not None and recorder.count > budget:
+            message = (
+                f"{view_name} made {recorder.count} queries, "
+                f"budget is {budget}"
+            )
+            if settings.CARDS_QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
@@ -0,0 +1,33 @@
+# Generated by Django 4.1.3 on 2026-10-18 12:43
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def fill_next_number(apps, schema_editor):
+    CardSeries = apps.get_model("cards", "CardSeries")
+    Card = apps.get_model("cards", "Card")
+    max_numbers = (Card.objects
+                       .values("series")
+                       .annotate(max_number=Max("number"))
+                       .order_by())
+    for row in max_numbers:
+        (CardSeries.objects
+                   .filter(pk=row["series"])
+                   .update(next_number=row["max_number"] + 1))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0002_remove_cardseries_duration_type_cardseries_duration'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cardseries',
+            name='next_number',
+            field=models.PositiveIntegerField(default=1, help_text='Next card number to be allocated in series', verbose_name='next_number'),
+        ),
+        migrations.RunPython(fill_next_number, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.1.3 on 2026-10-18 12:44
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0003_cardseries_next_number'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GenerationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cards_count', models.PositiveIntegerField(help_text='Cards count to generate', validators=[django.core.validators.MinValueValidator(1, 'Minimum card count to generate is 1.')], verbose_name='cards_count')),
+                ('first_number', models.PositiveIntegerField(blank=True, help_text='First card number reserved for job', null=True, verbose_name='first_number')),
+                ('cards_created', models.PositiveIntegerField(default=0, help_text='Cards generated so far', verbose_name='cards_created')),
+                ('status', models.PositiveSmallIntegerField(choices=[(0, 'Pending'), (1, 'Running'), (2, 'Done'), (3, 'Failed')], default=0, help_text='Job status', verbose_name='status')),
+                ('error', models.TextField(blank=True, help_text='Error message of failed job', verbose_name='error')),
+                ('created_date', models.DateTimeField(default=django.utils.timezone.now, help_text='Job creation date', verbose_name='created_date')),
+                ('started_date', models.DateTimeField(blank=True, help_text='Job start date', null=True, verbose_name='started_date')),
+                ('finished_date', models.DateTimeField(blank=True, help_text='Job finish date', null=True, verbose_name='finished_date')),
+                ('series', models.ForeignKey(help_text='Card series to generate cards in', on_delete=django.db.models.deletion.CASCADE, related_name='generation_jobs', to='cards.cardseries', verbose_name='series')),
+            ],
+            options={
+                'verbose_name': 'generation_job',
+                'verbose_name_plural': 'generation_jobs',
+                'ordering': ('-id',),
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.1.3 on 2026-10-18 13:02
+
+from django.db import migrations, models
+
+
+def fill_valid_until(apps, schema_editor):
+    CardSeries = apps.get_model("cards", "CardSeries")
+    CardSeries.objects.update(
+        valid_until=models.F("issue_date") + models.F("duration")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0004_generationjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cardseries',
+            name='valid_until',
+            field=models.DateTimeField(db_index=True, editable=False, help_text='Card series expiry date', null=True, verbose_name='valid_until'),
+        ),
+        migrations.RunPython(fill_valid_until, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='cardseries',
+            name='valid_until',
+            field=models.DateTimeField(db_index=True, editable=False, help_text='Card series expiry date', verbose_name='valid_until'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.1.3 on 2026-10-18 12:48
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fill_status(apps, schema_editor):
+    Card = apps.get_model("cards", "Card")
+    Card.objects.filter(is_active=True).update(status=1)
+    Card.objects.filter(series__valid_until__lte=timezone.now()).update(
+        status=2
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0005_cardseries_valid_until'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='card',
+            name='status',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'Not activated'), (1, 'Active'), (2, 'Outdated')], db_index=True, default=0, help_text='Card status', verbose_name='status'),
+        ),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['series', 'status'], name='card_series_status_idx'),
+        ),
+        migrations.RunPython(fill_status, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.1.3 on 2026-10-18 12:51
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0006_card_status'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cardseries',
+            name='issue_date',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, help_text='Card issue date', verbose_name='issue_date'),
+        ),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['number'], name='card_number_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['is_active', 'series'], name='card_is_active_series_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['card', 'date_time'], name='transaction_card_date_idx'),
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 4.1.3 on 2026-10-18 13:02
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Abs
+import django.db.models.deletion
+import django.utils.timezone
+
+ACTIVATED = 1
+OUTDATED = 2
+
+
+def fill_series_stats(apps, schema_editor):
+    CardSeries = apps.get_model("cards", "CardSeries")
+    Card = apps.get_model("cards", "Card")
+    Transaction = apps.get_model("cards", "Transaction")
+    SeriesStats = apps.get_model("cards", "SeriesStats")
+    series_stats = {
+        series_id: SeriesStats(series_id=series_id)
+        for series_id in CardSeries.objects.values_list("pk", flat=True)
+    }
+    card_totals = (Card.objects
+                       .values("series_id")
+                       .annotate(
+                           cards_count=Count("pk"),
+                           active_count=Count(
+                               "pk", filter=Q(status=ACTIVATED)
+                           ),
+                           outdated_count=Count(
+                               "pk", filter=Q(status=OUTDATED)
+                           ),
+                           total_balance=Sum("balance"),
+                       )
+                       .order_by())
+    for row in card_totals:
+        stats = series_stats[row.pop("series_id")]
+        for field_name, value in row.items():
+            setattr(stats, field_name, value)
+    transaction_totals = (Transaction.objects
+                                     .values("card__series_id")
+                                     .annotate(
+                                         transactions_count=Count("pk"),
+                                         transactions_volume=Sum(
+                                             Abs("amount")
+                                         ),
+                                     )
+                                     .order_by())
+    for row in transaction_totals:
+        stats = series_stats[row.pop("card__series_id")]
+        for field_name, value in row.items():
+            setattr(stats, field_name, value)
+    SeriesStats.objects.bulk_create(series_stats.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0007_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeriesStats',
+            fields=[
+                ('series', models.OneToOneField(help_text='Card series', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='cards.cardseries', verbose_name='series')),
+                ('cards_count', models.PositiveIntegerField(default=0, help_text='Cards count in series', verbose_name='cards_count')),
+                ('active_count', models.PositiveIntegerField(default=0, help_text='Active cards count in series', verbose_name='active_count')),
+                ('outdated_count', models.PositiveIntegerField(default=0, help_text='Outdated cards count in series', verbose_name='outdated_count')),
+                ('total_balance', models.DecimalField(decimal_places=2, default=Decimal('0'), help_text='Total balance of cards in series', max_digits=16, verbose_name='total_balance')),
+                ('transactions_count', models.PositiveBigIntegerField(default=0, help_text='Transactions count of cards in series', verbose_name='transactions_count')),
+                ('transactions_volume', models.DecimalField(decimal_places=2, default=Decimal('0'), help_text='Total absolute amount of transactions in series', max_digits=18, verbose_name='transactions_volume')),
+                ('updated_date', models.DateTimeField(default=django.utils.timezone.now, help_text='Date of last statistics update', verbose_name='updated_date')),
+            ],
+            options={
+                'verbose_name': 'series_stats',
+                'verbose_name_plural': 'series_stats',
+                'ordering': ('-series',),
+            },
+        ),
+        migrations.RunPython(fill_series_stats, migrations.RunPython.noop),
+    ]
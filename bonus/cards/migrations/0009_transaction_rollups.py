@@ -0,0 +1,49 @@
+# Generated by Django 4.1.3 on 2026-10-18 13:14
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0008_seriesstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupMark',
+            fields=[
+                ('name', models.CharField(help_text='Rollup name', max_length=50, primary_key=True, serialize=False, verbose_name='name')),
+                ('last_id', models.PositiveBigIntegerField(default=0, help_text='Last primary key included in rollup', verbose_name='last_id')),
+                ('updated_date', models.DateTimeField(default=django.utils.timezone.now, help_text='Date of last rollup update', verbose_name='updated_date')),
+            ],
+            options={
+                'verbose_name': 'rollup_mark',
+                'verbose_name_plural': 'rollup_marks',
+            },
+        ),
+        migrations.CreateModel(
+            name='TransactionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.PositiveSmallIntegerField(choices=[(0, 'Hour'), (1, 'Day')], help_text='Rollup bucket length', verbose_name='period')),
+                ('bucket', models.DateTimeField(help_text='Rollup bucket start', verbose_name='bucket')),
+                ('transactions_count', models.PositiveIntegerField(default=0, help_text='Transactions count in bucket', verbose_name='transactions_count')),
+                ('amount_total', models.DecimalField(decimal_places=2, default=Decimal('0'), help_text='Sum of transaction amounts in bucket', max_digits=16, verbose_name='amount_total')),
+                ('cards_count', models.PositiveIntegerField(default=0, help_text='Distinct cards count in bucket', verbose_name='cards_count')),
+                ('series', models.ForeignKey(help_text='Card series', on_delete=django.db.models.deletion.CASCADE, related_name='transaction_rollups', to='cards.cardseries', verbose_name='series')),
+            ],
+            options={
+                'verbose_name': 'transaction_rollup',
+                'verbose_name_plural': 'transaction_rollups',
+                'ordering': ('period', 'bucket', 'series'),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='transactionrollup',
+            constraint=models.UniqueConstraint(fields=('period', 'bucket', 'series'), name='period_bucket_series_to_be_unique'),
+        ),
+    ]
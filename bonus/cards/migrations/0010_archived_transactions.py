@@ -0,0 +1,35 @@
+# Generated by Django 4.1.3 on 2026-10-18 13:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0009_transaction_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTransaction',
+            fields=[
+                ('id', models.BigIntegerField(help_text='Primary key of archived transaction', primary_key=True, serialize=False, verbose_name='id')),
+                ('amount', models.DecimalField(decimal_places=2, help_text='Transaction amount', max_digits=10, verbose_name='amount')),
+                ('date_time', models.DateTimeField(help_text='Transaction date and time', verbose_name='date_time')),
+                ('description', models.CharField(help_text='Transaction description', max_length=100, verbose_name='description')),
+                ('archived_date', models.DateTimeField(default=django.utils.timezone.now, help_text='Date of transaction archival', verbose_name='archived_date')),
+                ('card', models.ForeignKey(help_text='card', on_delete=django.db.models.deletion.CASCADE, related_name='archived_transactions', to='cards.card', verbose_name='card')),
+            ],
+            options={
+                'verbose_name': 'archived_transaction',
+                'verbose_name_plural': 'archived_transactions',
+                'ordering': ('-id',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedtransaction',
+            index=models.Index(fields=['card', 'date_time'], name='archived_card_date_idx'),
+        ),
+    ]
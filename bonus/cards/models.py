@@ -5,12 +5,7 @@ from django.core.validators import MinValueValidator
 from django.db import models
 from django.utils import timezone
 
-
-class CardValidDateAnnotatedManager(models.Manager):
-    def get_queryset(self):
-        return super().get_queryset().annotate(
-            valid_until_date=(models.F("issue_date") + models.F("duration"))
-        )
+from .codec import encode_printable
 
 
 class CardSeries(models.Model):
@@ -34,13 +29,24 @@ class CardSeries(models.Model):
         default=timezone.now,
         verbose_name="issue_date",
         help_text="Card issue date",
+        db_index=True,
     )
     description = models.CharField(
         max_length=100,
         verbose_name="description",
         help_text="Card series description",
     )
-    objects = CardValidDateAnnotatedManager()
+    valid_until = models.DateTimeField(
+        verbose_name="valid_until",
+        help_text="Card series expiry date",
+        db_index=True,
+        editable=False,
+    )
+    next_number = models.PositiveIntegerField(
+        default=1,
+        verbose_name="next_number",
+        help_text="Next card number to be allocated in series",
+    )
 
     class Meta:
         verbose_name = "card_series"
@@ -50,6 +56,14 @@ class CardSeries(models.Model):
     def __str__(self):
         return f"CardSeries({self.printable_number})"
 
+    def save(self, *args, **kwargs):
+        self.valid_until = self.issue_date + self.duration
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            if {"issue_date", "duration"} & set(update_fields):
+                kwargs["update_fields"] = {*update_fields, "valid_until"}
+        super().save(*args, **kwargs)
+
     @property
     def series(self):
         return self.pk
@@ -58,15 +72,22 @@ class CardSeries(models.Model):
     def printable_number(self):
         return f"{self.series:0>5}"
 
-    @property
-    def valid_until(self):
-        return (self.issue_date + self.duration)
-
     @property
     def cards_count(self):
         return self.cards.count()
 
 
+class CardQuerySet(models.QuerySet):
+    def expired(self, now=None):
+        return self.filter(series__valid_until__lte=now or timezone.now())
+
+    def not_expired(self, now=None):
+        return self.filter(series__valid_until__gt=now or timezone.now())
+
+    def with_status(self, status):
+        return self.filter(status=status)
+
+
 class Card(models.Model):
     NOT_ACTIVATED = 0
     ACTIVATED = 1
@@ -77,6 +98,7 @@ class Card(models.Model):
         ACTIVATED: "Active",
         OUTDATED: "Outdated",
     }
+    CARD_STATUSES = list(HUMANREADABLE_CARD_STATUSES.items())
 
     series = models.ForeignKey(
         CardSeries,
@@ -109,6 +131,14 @@ class Card(models.Model):
         help_text="Is card active?",
         default=False,
     )
+    status = models.PositiveSmallIntegerField(
+        verbose_name="status",
+        help_text="Card status",
+        choices=CARD_STATUSES,
+        default=NOT_ACTIVATED,
+        db_index=True,
+    )
+    objects = CardQuerySet.as_manager()
 
     class Meta:
         verbose_name = "card"
@@ -124,13 +154,27 @@ class Card(models.Model):
                 name="series_number_pair_to_be_unique"
             ),
         )
+        indexes = (
+            models.Index(
+                fields=("series", "status"),
+                name="card_series_status_idx",
+            ),
+            models.Index(
+                fields=("number",),
+                name="card_number_idx",
+            ),
+            models.Index(
+                fields=("is_active", "series"),
+                name="card_is_active_series_idx",
+            ),
+        )
 
     def __str__(self):
         return f"Card({self.printable_number})"
 
     @property
     def printable_number(self):
-        return f"{self.series.printable_number}-{self.number:0>7}"
+        return encode_printable(self.series_id, self.number)
 
     @property
     def valid_until(self):
@@ -141,7 +185,7 @@ class Card(models.Model):
         return self.series.duration
 
     @property
-    def status(self):
+    def actual_status(self):
         if timezone.now() < self.valid_until:
             if self.is_active:
                 return Card.ACTIVATED
@@ -189,6 +233,295 @@ class Transaction(models.Model):
                 name="zero_amount_transaction_disallowed"
             ),
         )
+        indexes = (
+            models.Index(
+                fields=("card", "date_time"),
+                name="transaction_card_date_idx",
+            ),
+        )
 
     def __str__(self):
         return f"Transaction({self.amount})<Card({self.card})>"
+
+
+class ArchivedTransaction(models.Model):
+    """
+    Transaction moved out of the hot Transaction table by archival.
+
+    Primary keys are kept, so archived and hot transactions of a card can
+    be ordered and paginated together.
+    """
+    id = models.BigIntegerField(
+        primary_key=True,
+        verbose_name="id",
+        help_text="Primary key of archived transaction",
+    )
+    card = models.ForeignKey(
+        Card,
+        related_name="archived_transactions",
+        on_delete=models.CASCADE,
+        verbose_name="card",
+        help_text="card",
+    )
+    amount = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        verbose_name="amount",
+        help_text="Transaction amount",
+    )
+    date_time = models.DateTimeField(
+        verbose_name="date_time",
+        help_text="Transaction date and time",
+    )
+    description = models.CharField(
+        max_length=100,
+        verbose_name="description",
+        help_text="Transaction description",
+    )
+    archived_date = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="archived_date",
+        help_text="Date of transaction archival",
+    )
+
+    class Meta:
+        verbose_name = "archived_transaction"
+        verbose_name_plural = "archived_transactions"
+        ordering = ("-id",)
+        indexes = (
+            models.Index(
+                fields=("card", "date_time"),
+                name="archived_card_date_idx",
+            ),
+        )
+
+    def __str__(self):
+        return f"ArchivedTransaction({self.amount})<Card({self.card})>"
+
+
+# hot and archived transactions share one primary key sequence, totals
+# over both tables count every transaction once
+TRANSACTION_MODELS = (Transaction, ArchivedTransaction)
+
+
+class SeriesStats(models.Model):
+    series = models.OneToOneField(
+        CardSeries,
+        primary_key=True,
+        related_name="stats",
+        on_delete=models.CASCADE,
+        verbose_name="series",
+        help_text="Card series",
+    )
+    cards_count = models.PositiveIntegerField(
+        verbose_name="cards_count",
+        help_text="Cards count in series",
+        default=0,
+    )
+    active_count = models.PositiveIntegerField(
+        verbose_name="active_count",
+        help_text="Active cards count in series",
+        default=0,
+    )
+    outdated_count = models.PositiveIntegerField(
+        verbose_name="outdated_count",
+        help_text="Outdated cards count in series",
+        default=0,
+    )
+    total_balance = models.DecimalField(
+        max_digits=16,
+        decimal_places=2,
+        verbose_name="total_balance",
+        help_text="Total balance of cards in series",
+        default=Decimal(0.0),
+    )
+    transactions_count = models.PositiveBigIntegerField(
+        verbose_name="transactions_count",
+        help_text="Transactions count of cards in series",
+        default=0,
+    )
+    transactions_volume = models.DecimalField(
+        max_digits=18,
+        decimal_places=2,
+        verbose_name="transactions_volume",
+        help_text="Total absolute amount of transactions in series",
+        default=Decimal(0.0),
+    )
+    updated_date = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="updated_date",
+        help_text="Date of last statistics update",
+    )
+
+    class Meta:
+        verbose_name = "series_stats"
+        verbose_name_plural = "series_stats"
+        ordering = ("-series",)
+
+    def __str__(self):
+        return f"SeriesStats<{self.series_id:0>5}>"
+
+
+class TransactionRollup(models.Model):
+    HOUR = 0
+    DAY = 1
+
+    ROLLUP_PERIODS = [
+        (HOUR, "Hour"),
+        (DAY, "Day"),
+    ]
+
+    series = models.ForeignKey(
+        CardSeries,
+        related_name="transaction_rollups",
+        on_delete=models.CASCADE,
+        verbose_name="series",
+        help_text="Card series",
+    )
+    period = models.PositiveSmallIntegerField(
+        verbose_name="period",
+        help_text="Rollup bucket length",
+        choices=ROLLUP_PERIODS,
+    )
+    bucket = models.DateTimeField(
+        verbose_name="bucket",
+        help_text="Rollup bucket start",
+    )
+    transactions_count = models.PositiveIntegerField(
+        verbose_name="transactions_count",
+        help_text="Transactions count in bucket",
+        default=0,
+    )
+    amount_total = models.DecimalField(
+        max_digits=16,
+        decimal_places=2,
+        verbose_name="amount_total",
+        help_text="Sum of transaction amounts in bucket",
+        default=Decimal(0.0),
+    )
+    cards_count = models.PositiveIntegerField(
+        verbose_name="cards_count",
+        help_text="Distinct cards count in bucket",
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = "transaction_rollup"
+        verbose_name_plural = "transaction_rollups"
+        ordering = ("period", "bucket", "series")
+        constraints = (
+            models.UniqueConstraint(
+                fields=("period", "bucket", "series"),
+                name="period_bucket_series_to_be_unique"
+            ),
+        )
+
+    def __str__(self):
+        return (f"TransactionRollup({self.get_period_display()} "
+                f"{self.bucket})<{self.series_id:0>5}>")
+
+
+class RollupMark(models.Model):
+    name = models.CharField(
+        max_length=50,
+        primary_key=True,
+        verbose_name="name",
+        help_text="Rollup name",
+    )
+    last_id = models.PositiveBigIntegerField(
+        verbose_name="last_id",
+        help_text="Last primary key included in rollup",
+        default=0,
+    )
+    updated_date = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="updated_date",
+        help_text="Date of last rollup update",
+    )
+
+    class Meta:
+        verbose_name = "rollup_mark"
+        verbose_name_plural = "rollup_marks"
+
+    def __str__(self):
+        return f"RollupMark({self.name})<{self.last_id}>"
+
+
+class GenerationJob(models.Model):
+    PENDING = 0
+    RUNNING = 1
+    DONE = 2
+    FAILED = 3
+
+    JOB_STATUSES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    series = models.ForeignKey(
+        CardSeries,
+        related_name="generation_jobs",
+        on_delete=models.CASCADE,
+        verbose_name="series",
+        help_text="Card series to generate cards in",
+    )
+    cards_count = models.PositiveIntegerField(
+        verbose_name="cards_count",
+        help_text="Cards count to generate",
+        validators=(
+            MinValueValidator(1, "Minimum card count to generate is 1."),
+        ),
+    )
+    first_number = models.PositiveIntegerField(
+        verbose_name="first_number",
+        help_text="First card number reserved for job",
+        null=True,
+        blank=True,
+    )
+    cards_created = models.PositiveIntegerField(
+        verbose_name="cards_created",
+        help_text="Cards generated so far",
+        default=0,
+    )
+    status = models.PositiveSmallIntegerField(
+        verbose_name="status",
+        help_text="Job status",
+        choices=JOB_STATUSES,
+        default=PENDING,
+    )
+    error = models.TextField(
+        verbose_name="error",
+        help_text="Error message of failed job",
+        blank=True,
+    )
+    created_date = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="created_date",
+        help_text="Job creation date",
+    )
+    started_date = models.DateTimeField(
+        verbose_name="started_date",
+        help_text="Job start date",
+        null=True,
+        blank=True,
+    )
+    finished_date = models.DateTimeField(
+        verbose_name="finished_date",
+        help_text="Job finish date",
+        null=True,
+        blank=True,
+    )
+
+    class Meta:
+        verbose_name = "generation_job"
+        verbose_name_plural = "generation_jobs"
+        ordering = ("-id",)
+
+    def __str__(self):
+        return f"GenerationJob({self.pk})<{self.series}>"
+
+    @property
+    def progress(self):
+        return round(self.cards_created * 100 / self.cards_count, 2)
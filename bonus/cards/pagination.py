@@ -0,0 +1,194 @@
+from dataclasses import dataclass
+from itertools import chain
+from operator import attrgetter
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+
+CURSOR_PARAMS = ("after", "before")
+
+
+@dataclass
+class KeysetPage:
+    object_list: list
+    has_next: bool
+    has_previous: bool
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    @property
+    def next_cursor(self):
+        if self.has_next and self.object_list:
+            return self.object_list[-1].pk
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous and self.object_list:
+            return self.object_list[0].pk
+        return None
+
+
+def get_cursor(request, name):
+    cursor = request.GET.get(name)
+    if not cursor:
+        return None
+    try:
+        return int(cursor)
+    except ValueError:
+        raise Http404("Invalid cursor.")
+
+
+def get_keyset_queryset(queryset, page_size, after=None, before=None,
+                        descending=False):
+    """
+    Returns `queryset` slice of a page seeking by primary key from a cursor.
+
+    `after` continues forward from the last object of the previous page,
+    `before` goes back from the first object of the next one. Page cost
+    does not depend on its position, unlike OFFSET pagination. One extra
+    object is fetched to tell whether there are more pages.
+    """
+    forward = before is None
+    if forward == descending:
+        queryset = queryset.order_by("-pk")
+    else:
+        queryset = queryset.order_by("pk")
+
+    cursor = after if forward else before
+    if cursor is not None:
+        if forward == descending:
+            queryset = queryset.filter(pk__lt=cursor)
+        else:
+            queryset = queryset.filter(pk__gt=cursor)
+    return queryset[:page_size + 1]
+
+
+def get_keyset_page(object_list, page_size, after=None, before=None):
+    has_more = len(object_list) > page_size
+    object_list = object_list[:page_size]
+
+    if before is None:
+        return KeysetPage(
+            object_list=object_list,
+            has_next=has_more,
+            has_previous=after is not None,
+        )
+    return KeysetPage(
+        object_list=object_list[::-1],
+        has_next=True,
+        has_previous=has_more,
+    )
+
+
+def merge_keyset_lists(object_lists, page_size, before=None,
+                       descending=False):
+    """
+    Merges `get_keyset_queryset` results of querysets sharing a primary key
+    sequence into one page slice.
+    """
+    forward = before is None
+    object_list = sorted(chain.from_iterable(object_lists),
+                         key=attrgetter("pk"),
+                         reverse=forward == descending)
+    return object_list[:page_size + 1]
+
+
+def paginate_keyset(queryset, page_size, after=None, before=None,
+                    descending=False, merged_querysets=()):
+    """
+    Returns keyset page of `queryset` merged with `merged_querysets`.
+
+    Every merged queryset costs one more query for the page.
+    """
+    object_lists = [
+        get_keyset_queryset(page_queryset, page_size, after, before,
+                            descending).iterator(chunk_size=page_size + 1)
+        for page_queryset in (queryset, *merged_querysets)
+    ]
+    object_list = merge_keyset_lists(object_lists, page_size, before,
+                                     descending)
+    return get_keyset_page(object_list, page_size, after, before)
+
+
+async def apaginate_keyset(queryset, page_size, after=None, before=None,
+                           descending=False, merged_querysets=()):
+    object_lists = [
+        [obj async for obj in get_keyset_queryset(page_queryset, page_size,
+                                                  after, before, descending)]
+        for page_queryset in (queryset, *merged_querysets)
+    ]
+    object_list = merge_keyset_lists(object_lists, page_size, before,
+                                     descending)
+    return get_keyset_page(object_list, page_size, after, before)
+
+
+def get_canonical_query_string(query_dict):
+    """
+    Returns sorted non-empty query parameters without pagination cursors.
+    """
+    params = sorted(
+        (key, value)
+        for key, values in query_dict.lists() if key not in CURSOR_PARAMS
+        for value in values if value
+    )
+    return urlencode(params)
+
+
+def get_cached_count(queryset, cache_key, timeout=None):
+    if timeout is None:
+        timeout = settings.CARDS_COUNT_CACHE_TIMEOUT
+    return cache.get_or_set(cache_key, queryset.count, timeout)
+
+
+class KeysetPaginationMixin:
+    """
+    ListView mixin replacing OFFSET pagination with keyset pagination.
+
+    Total objects count is only computed when `get_count_cache_key` returns
+    a key, and then is cached for CARDS_COUNT_CACHE_TIMEOUT seconds.
+    """
+    page_size = settings.CARDS_PER_PAGE_NUMBER
+    descending = False
+
+    def get_count_cache_key(self):
+        return None
+
+    def get_merged_querysets(self):
+        """
+        Returns querysets sharing primary key sequence with the view
+        queryset to paginate together with it.
+        """
+        return ()
+
+    def get_context_data(self, **kwargs):
+        queryset = kwargs.pop("object_list", self.object_list)
+        merged_querysets = self.get_merged_querysets()
+        page = paginate_keyset(
+            queryset,
+            page_size=self.page_size,
+            after=get_cursor(self.request, "after"),
+            before=get_cursor(self.request, "before"),
+            descending=self.descending,
+            merged_querysets=merged_querysets,
+        )
+        total_count = None
+        count_cache_key = self.get_count_cache_key()
+        if count_cache_key is not None:
+            total_count = sum(
+                get_cached_count(merged_queryset,
+                                 f"{count_cache_key}:{index}")
+                for index, merged_queryset in enumerate(merged_querysets,
+                                                        start=1)
+            )
+            total_count += get_cached_count(queryset, count_cache_key)
+        return super().get_context_data(
+            object_list=page.object_list,
+            keyset_page=page,
+            total_count=total_count,
+            **kwargs,
+        )
@@ -0,0 +1,207 @@
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .models import TRANSACTION_MODELS, RollupMark, TransactionRollup
+
+TRANSACTION_ROLLUP = "transactions"
+ROLLUP_FIELDS = ("transactions_count", "amount_total", "cards_count")
+
+
+@dataclass
+class RollupStats:
+    transactions_rolled: int = 0
+    buckets_updated: int = 0
+    last_id: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self):
+        if not self.elapsed:
+            return 0.0
+        return self.transactions_rolled / self.elapsed
+
+
+def get_buckets(date_time):
+    """
+    Returns `{period: bucket}` start dates of `date_time` in current time
+    zone.
+    """
+    hour = timezone.localtime(date_time).replace(minute=0, second=0,
+                                                 microsecond=0)
+    return {
+        TransactionRollup.HOUR: hour,
+        TransactionRollup.DAY: hour.replace(hour=0),
+    }
+
+
+def get_rolled_card_buckets(card_ids, date_from, date_to, last_id):
+    """
+    Returns `(period, bucket, card_id)` triples of transactions already
+    included in rollups.
+
+    Only cards of the rolled chunk are checked, so the queries are driven
+    by (card, date_time) indexes whatever the date range is.
+    """
+    rolled = set()
+    for model in TRANSACTION_MODELS:
+        rolled_hours = (model.objects
+                             .filter(pk__lte=last_id,
+                                     card_id__in=card_ids,
+                                     date_time__gte=date_from,
+                                     date_time__lt=date_to)
+                             .annotate(hour=TruncHour("date_time"))
+                             .values_list("card_id", "hour")
+                             .order_by()
+                             .distinct())
+        for card_id, hour in rolled_hours:
+            for period, bucket in get_buckets(hour).items():
+                rolled.add((period, bucket, card_id))
+    return rolled
+
+
+def get_transaction_rows(last_id, chunk_size):
+    """
+    Returns first `chunk_size` hot or archived transactions after `last_id`.
+
+    Hot table is read first: a transaction archived between the reads is
+    then found in either table or in both, and duplicates are dropped.
+    """
+    rows = {}
+    for model in TRANSACTION_MODELS:
+        for row in (model.objects
+                         .filter(pk__gt=last_id)
+                         .order_by("pk")
+                         .values_list("pk", "card_id", "card__series_id",
+                                      "amount", "date_time")[:chunk_size]):
+            rows[row[0]] = row
+    return [rows[pk] for pk in sorted(rows)[:chunk_size]]
+
+
+def roll_up_chunk(mark, chunk_size, stats):
+    """
+    Adds transactions following `mark` to hourly and daily rollups.
+
+    Counts and amounts are added to existing buckets, distinct cards are
+    counted only when a card has no rolled transactions in the bucket.
+    Returns False when there is nothing to roll up.
+    """
+    rows = get_transaction_rows(mark.last_id, chunk_size)
+    if not rows:
+        return False
+
+    totals = defaultdict(lambda: [0, Decimal(0), set()])
+    for _, card_id, series_id, amount, date_time in rows:
+        for period, bucket in get_buckets(date_time).items():
+            bucket_totals = totals[(period, bucket, series_id)]
+            bucket_totals[0] += 1
+            bucket_totals[1] += amount
+            bucket_totals[2].add(card_id)
+
+    days = [bucket for period, bucket, _ in totals
+            if period == TransactionRollup.DAY]
+    date_from, date_to = min(days), max(days) + timedelta(days=1)
+    rolled = get_rolled_card_buckets(
+        {card_id for _, card_id, *_ in rows}, date_from, date_to,
+        mark.last_id,
+    )
+
+    rollups = {
+        (rollup.period, rollup.bucket, rollup.series_id): rollup
+        for rollup in TransactionRollup.objects.filter(
+            bucket__gte=date_from,
+            bucket__lt=date_to,
+            series_id__in={series_id for *_, series_id in totals},
+        )
+    }
+    new_rollups = []
+    for key, (count, amount, card_ids) in totals.items():
+        period, bucket, series_id = key
+        rollup = rollups.get(key)
+        if rollup is None:
+            rollup = TransactionRollup(period=period, bucket=bucket,
+                                       series_id=series_id)
+            new_rollups.append(rollup)
+        rollup.transactions_count += count
+        rollup.amount_total += amount
+        rollup.cards_count += sum((period, bucket, card_id) not in rolled
+                                  for card_id in card_ids)
+    TransactionRollup.objects.bulk_update(
+        [rollups[key] for key in totals if key in rollups],
+        fields=ROLLUP_FIELDS,
+        batch_size=1000,
+    )
+    TransactionRollup.objects.bulk_create(new_rollups, batch_size=1000)
+
+    mark.last_id = rows[-1][0]
+    mark.updated_date = timezone.now()
+    mark.save(update_fields=("last_id", "updated_date"))
+    stats.transactions_rolled += len(rows)
+    stats.buckets_updated += len(totals)
+    stats.last_id = mark.last_id
+    return True
+
+
+def roll_up_transactions(chunk_size=None, progress_callback=None):
+    """
+    Rolls transactions up into buckets from the stored high-water mark.
+
+    Every chunk is rolled in its own transaction together with the mark,
+    with the mark row locked, so concurrent or interrupted runs never
+    count transactions twice. Transactions committed with an id below the
+    mark after it has passed them are picked up by a rebuild only.
+    """
+    if chunk_size is None:
+        chunk_size = settings.CARDS_ROLLUP_CHUNK_SIZE
+
+    stats = RollupStats()
+    started = time.perf_counter()
+    RollupMark.objects.get_or_create(name=TRANSACTION_ROLLUP)
+
+    while True:
+        with transaction.atomic():
+            mark = (RollupMark.objects
+                              .select_for_update()
+                              .get(name=TRANSACTION_ROLLUP))
+            if not roll_up_chunk(mark, chunk_size, stats):
+                break
+        stats.elapsed = time.perf_counter() - started
+        if progress_callback is not None:
+            progress_callback(stats)
+
+    stats.elapsed = time.perf_counter() - started
+    return stats
+
+
+def reset_transaction_rollups():
+    with transaction.atomic():
+        mark, _ = (RollupMark.objects
+                             .select_for_update()
+                             .get_or_create(name=TRANSACTION_ROLLUP))
+        TransactionRollup.objects.all().delete()
+        mark.last_id = 0
+        mark.updated_date = timezone.now()
+        mark.save(update_fields=("last_id", "updated_date"))
+
+
+def get_transaction_analytics(period, date_from, date_to, series_id=None):
+    """
+    Returns per-bucket totals of `period` rollups in `[date_from, date_to)`.
+    """
+    rollups = TransactionRollup.objects.filter(period=period,
+                                               bucket__gte=date_from,
+                                               bucket__lt=date_to)
+    if series_id is not None:
+        rollups = rollups.filter(series_id=series_id)
+    return (rollups.values("bucket")
+                   .annotate(**{field_name: Sum(field_name)
+                                for field_name in ROLLUP_FIELDS})
+                   .order_by("bucket"))
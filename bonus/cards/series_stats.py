@@ -0,0 +1,191 @@
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Abs
+from django.utils import timezone
+
+from .models import TRANSACTION_MODELS, Card, CardSeries, SeriesStats
+
+SERIES_STATS_FIELDS = (
+    "cards_count",
+    "active_count",
+    "outdated_count",
+    "total_balance",
+    "transactions_count",
+    "transactions_volume",
+)
+STATUS_COUNT_FIELDS = {
+    Card.ACTIVATED: "active_count",
+    Card.OUTDATED: "outdated_count",
+}
+CARD_TOTALS = {
+    "cards_count": Count("pk"),
+    "active_count": Count("pk", filter=Q(status=Card.ACTIVATED)),
+    "outdated_count": Count("pk", filter=Q(status=Card.OUTDATED)),
+    "total_balance": Sum("balance"),
+}
+TRANSACTION_TOTALS = {
+    "transactions_count": Count("pk"),
+    "transactions_volume": Sum(Abs("amount")),
+}
+
+
+@dataclass
+class RebuildStats:
+    series_rebuilt: int = 0
+    series_drifted: int = 0
+    elapsed: float = 0.0
+
+
+def new_deltas():
+    """
+    Returns empty `{series_id: {field_name: delta}}` mapping.
+    """
+    return defaultdict(Counter)
+
+
+def get_status_deltas(status_counts, new_status):
+    """
+    Returns deltas of moving `{(series_id, status): count}` cards to
+    `new_status`.
+    """
+    deltas = new_deltas()
+    for (series_id, status), count in status_counts.items():
+        if status == new_status:
+            continue
+        if status in STATUS_COUNT_FIELDS:
+            deltas[series_id][STATUS_COUNT_FIELDS[status]] -= count
+        if new_status in STATUS_COUNT_FIELDS:
+            deltas[series_id][STATUS_COUNT_FIELDS[new_status]] += count
+    return deltas
+
+
+def get_transaction_deltas(amounts):
+    """
+    Returns deltas of posting `(series_id, amount)` transactions.
+    """
+    deltas = new_deltas()
+    for series_id, amount in amounts:
+        deltas[series_id]["total_balance"] += amount
+        deltas[series_id]["transactions_count"] += 1
+        deltas[series_id]["transactions_volume"] += abs(amount)
+    return deltas
+
+
+def get_series_totals(cards):
+    """
+    Returns `{series_id: {field_name: total}}` statistics of `cards`
+    queryset and its hot and archived transactions.
+
+    Costs a grouped aggregate over the counted rows of every table.
+    """
+    totals = new_deltas()
+    card_totals = (cards.values("series_id")
+                        .annotate(**CARD_TOTALS)
+                        .order_by())
+    rows = list(card_totals)
+    for model in TRANSACTION_MODELS:
+        rows.extend(model.objects
+                         .filter(card__in=cards.values("pk"))
+                         .values(series_id=F("card__series_id"))
+                         .annotate(**TRANSACTION_TOTALS)
+                         .order_by())
+    for row in rows:
+        # Counter.update adds totals of both transaction tables
+        totals[row.pop("series_id")].update(row)
+    return totals
+
+
+def get_deletion_deltas(cards):
+    deltas = new_deltas()
+    for series_id, totals in get_series_totals(cards).items():
+        deltas[series_id].subtract(totals)
+    return deltas
+
+
+def apply_series_stats_deltas(deltas):
+    """
+    Moves series statistics by `deltas` with F() expressions.
+
+    Should be called inside the transaction changing the counted rows,
+    as late as possible: the UPDATE locks statistics row of every series
+    until commit. Series are updated in primary key order to avoid
+    deadlocks between concurrent writers. Series without statistics row
+    get it rebuilt instead.
+    """
+    now = timezone.now()
+    missing_series_ids = []
+    for series_id in sorted(deltas):
+        changes = {
+            field_name: F(field_name) + delta
+            for field_name, delta in deltas[series_id].items() if delta
+        }
+        if changes and not (SeriesStats.objects
+                                       .filter(series_id=series_id)
+                                       .update(updated_date=now, **changes)):
+            missing_series_ids.append(series_id)
+    if missing_series_ids:
+        # series created with bulk_create bypass the post_save receiver,
+        # counting them already includes changes of this transaction
+        rebuild_series_stats(missing_series_ids)
+
+
+def rebuild_series_stats(series_ids=None):
+    """
+    Recomputes series statistics from Card and Transaction tables.
+
+    Statistics rows are locked before counting, so incremental updates
+    committed concurrently are neither lost nor counted twice.
+    """
+    stats = RebuildStats()
+    started = time.perf_counter()
+    card_series = CardSeries.objects.order_by("pk")
+    if series_ids is not None:
+        card_series = card_series.filter(pk__in=series_ids)
+
+    with transaction.atomic():
+        existing_stats = {
+            series_stats.series_id: series_stats
+            for series_stats in (SeriesStats.objects
+                                            .select_for_update()
+                                            .filter(series__in=card_series))
+        }
+        now = timezone.now()
+        series_stats = {
+            series_id: SeriesStats(series_id=series_id, updated_date=now)
+            for series_id in card_series.values_list("pk", flat=True)
+        }
+        totals = get_series_totals(
+            Card.objects.filter(series__in=card_series)
+        )
+        for series_id, series_totals in totals.items():
+            for field_name, total in series_totals.items():
+                setattr(series_stats[series_id], field_name, total)
+
+        for series_id, new_stats in series_stats.items():
+            old_stats = existing_stats.get(series_id)
+            if old_stats is None or any(
+                getattr(old_stats, field_name) != getattr(new_stats,
+                                                          field_name)
+                for field_name in SERIES_STATS_FIELDS
+            ):
+                stats.series_drifted += 1
+        # rows are updated in place, deleting them would make concurrent
+        # writers waiting on their locks silently drop deltas
+        SeriesStats.objects.bulk_update(
+            [new_stats for series_id, new_stats in series_stats.items()
+             if series_id in existing_stats],
+            fields=(*SERIES_STATS_FIELDS, "updated_date"),
+            batch_size=1000,
+        )
+        SeriesStats.objects.bulk_create(
+            [new_stats for series_id, new_stats in series_stats.items()
+             if series_id not in existing_stats],
+            batch_size=1000,
+        )
+    stats.series_rebuilt = len(series_stats)
+    stats.elapsed = time.perf_counter() - started
+    return stats
@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_card_series, invalidate_cards
+from .db import apply_sqlite_pragmas, begin_immediate, slow_query_logger
+from .models import Card, CardSeries, SeriesStats, Transaction
+
+
+@receiver(post_save, sender=Card)
+@receiver(post_delete, sender=Card)
+def invalidate_card(sender, instance, **kwargs):
+    invalidate_cards((instance.pk,))
+
+
+# no post_delete receiver, it would disable fast cascade deletion of
+# transactions when cards are deleted
+@receiver(post_save, sender=Transaction)
+def invalidate_transaction_card(sender, instance, **kwargs):
+    invalidate_cards((instance.card_id,))
+
+
+@receiver(post_save, sender=CardSeries)
+@receiver(post_delete, sender=CardSeries)
+def invalidate_series(sender, instance, **kwargs):
+    invalidate_card_series(instance.pk)
+
+
+@receiver(post_save, sender=CardSeries)
+def create_series_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        SeriesStats.objects.get_or_create(series=instance)
+
+
+@receiver(connection_created)
+def setup_connection(sender, connection, **kwargs):
+    # the wrapper list outlives reconnects of the same connection object
+    wrappers = connection.execute_wrappers
+    if connection.vendor == "sqlite":
+        apply_sqlite_pragmas(connection)
+        if begin_immediate in wrappers:
+            wrappers.remove(begin_immediate)
+        if settings.CARDS_SQLITE_IMMEDIATE_TRANSACTIONS:
+            wrappers.append(begin_immediate)
+    if slow_query_logger not in wrappers:
+        wrappers.append(slow_query_logger)
@@ -0,0 +1,298 @@
+import json
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings, tag
+from django.urls import include, path, reverse
+
+from .benchmarks import (benchmark_card_codec, get_benchmark_scenarios,
+                         run_benchmark_suite, seed_benchmark_data)
+from .bulk import bulk_set_active
+from .importer import import_cards
+from .ledger import get_card_keys_query, ingest_transactions, post_transaction
+from .models import Card, CardSeries
+from .rollups import roll_up_transactions
+from .utils import generate_cards
+
+# project URLs include cards views only with DEBUG, which tests disable
+urlpatterns = [
+    path("admin/", admin.site.urls),
+    path("", include("cards.urls", namespace="cards")),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class CardSeriesQueryCountTests(TestCase):
+    """
+    Series pages read counts from SeriesStats, so their query count does
+    not grow with the number of series.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser(
+            "admin", "admin@example.com", "password"
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def create_series(self, count):
+        for _ in range(count):
+            generate_cards(CardSeries.objects.create(description="series"), 3)
+
+    def assert_series_list_queries(self, series_count, queries):
+        self.create_series(series_count)
+        with self.assertNumQueries(queries):
+            response = self.client.get(reverse("cards:card_series_list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["object_list"]), series_count)
+
+    def assert_admin_changelist_queries(self, series_count, queries):
+        self.create_series(series_count)
+        self.client.force_login(self.user)
+        with self.assertNumQueries(queries):
+            response = self.client.get(
+                reverse("admin:cards_cardseries_changelist")
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["cl"].result_count, series_count)
+
+    def test_series_list_one_series(self):
+        self.assert_series_list_queries(1, 1)
+
+    def test_series_list_many_series(self):
+        self.assert_series_list_queries(10, 1)
+
+    # session, user, filtered and total counts and the page with stats
+    def test_admin_changelist_one_series(self):
+        self.assert_admin_changelist_queries(1, 5)
+
+    def test_admin_changelist_many_series(self):
+        self.assert_admin_changelist_queries(10, 5)
+
+
+@override_settings(ROOT_URLCONF=__name__, CARDS_QUERY_BUDGET_STRICT=True)
+class QueryBudgetTests(TestCase):
+    """
+    Budgeted views stay within CARDS_QUERY_BUDGETS on a cold cache, strict
+    mode makes the middleware raise QueryBudgetExceeded otherwise.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        for _ in range(2):
+            card_series = CardSeries.objects.create(description="series")
+            generate_cards(card_series, 20)
+        bulk_set_active(Card.objects.all(), True)
+        cls.card = Card.objects.order_by("pk").first()
+        for amount in (10, -3):
+            post_transaction(cls.card.pk, amount, "purchase")
+        roll_up_transactions()
+
+    def setUp(self):
+        cache.clear()
+
+    def get_paths(self):
+        card = self.card
+        return {
+            "cards:index": reverse("cards:index"),
+            "cards:card_series_list": reverse("cards:card_series_list"),
+            "cards:card_list": reverse("cards:card_list"),
+            "cards:card_detail": reverse("cards:card_detail",
+                                         args=(card.pk,)),
+            "cards:view_card_transaction": (
+                reverse("cards:view_card_transaction", args=(card.pk,))
+                + "?archived=1"
+            ),
+            "cards:card_search": (
+                reverse("cards:card_search")
+                + f"?series__gte={card.series_id}"
+                + f"&series__lte={card.series_id + 1}"
+            ),
+            "cards:transaction_analytics": reverse(
+                "cards:transaction_analytics"
+            ),
+            "cards:card_balance": (reverse("cards:card_balance")
+                                   + f"?number={card.printable_number}"),
+            "cards:async_card_balance": (
+                reverse("cards:async_card_balance")
+                + f"?number={card.printable_number}"
+            ),
+            "cards:async_card_detail": reverse("cards:async_card_detail",
+                                               args=(card.pk,)),
+            "cards:async_card_transactions": (
+                reverse("cards:async_card_transactions", args=(card.pk,))
+                + "?archived=1"
+            ),
+        }
+
+    def test_all_budgets_covered(self):
+        self.assertEqual(set(self.get_paths()),
+                         set(settings.CARDS_QUERY_BUDGETS))
+
+    def test_sync_views(self):
+        for view_name, url in self.get_paths().items():
+            if view_name.startswith("cards:async_"):
+                continue
+            with self.subTest(view_name=view_name):
+                cache.clear()
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                # empty pages would skip queries the budget should cover
+                if response.context and "object_list" in response.context:
+                    self.assertTrue(response.context["object_list"])
+
+    async def test_async_views(self):
+        for view_name, url in self.get_paths().items():
+            if not view_name.startswith("cards:async_"):
+                continue
+            with self.subTest(view_name=view_name):
+                cache.clear()
+                response = await self.async_client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+
+class IngestTransactionsTests(TestCase):
+    """
+    Bad lines are rejected one by one without failing the batch.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        for _ in range(2):
+            card_series = CardSeries.objects.create(description="series")
+            generate_cards(card_series, 3)
+        bulk_set_active(Card.objects.all(), True)
+        cls.card = Card.objects.order_by("pk").first()
+
+    def ingest(self, *records):
+        lines = [json.dumps({"card": self.card.printable_number, **record})
+                 for record in records]
+        return list(ingest_transactions(lines))
+
+    def test_incorrect_records_rejected(self):
+        results = self.ingest(
+            {"amount": "NaN"},
+            {"amount": "Infinity"},
+            {"amount": "1e12"},
+            {"amount": "5", "date_time": "2024-13-45T00:00:00"},
+            {"amount": "5"},
+        )
+        self.assertEqual(
+            [result.get("error") for result in results],
+            ["Incorrect amount.", "Incorrect amount.",
+             "Amount is too large.", "Incorrect date_time.", None],
+        )
+        self.card.refresh_from_db()
+        self.assertEqual(self.card.balance, Decimal("5"))
+
+    def test_balance_limit(self):
+        results = self.ingest({"amount": "99999999"}, {"amount": "1"})
+        self.assertEqual(results[0]["status"], "ok")
+        self.assertEqual(results[1]["error"], "Balance is too large.")
+
+    def test_card_keys_query_matches_exact_pairs(self):
+        first, second = CardSeries.objects.order_by("pk")
+        cards = Card.objects.filter(get_card_keys_query(
+            ((first.pk, 1), (second.pk, 2))
+        ))
+        self.assertEqual(
+            set(cards.values_list("series_id", "number")),
+            {(first.pk, 1), (second.pk, 2)},
+        )
+
+
+class ImportCardsTests(TestCase):
+    def test_incorrect_balances_rejected(self):
+        card_series = CardSeries.objects.create(description="series")
+        lines = ["series,number,balance,is_active"] + [
+            f"{card_series.pk},{number},{balance},1"
+            for number, balance in enumerate(
+                ("NaN", "Infinity", "1e12", "100000000", "99999999.99"),
+                start=1,
+            )
+        ]
+        stats = import_cards(lines)
+        self.assertEqual(stats.cards_created, 1)
+        self.assertEqual(stats.rejected, [
+            (2, "Incorrect balance."),
+            (3, "Incorrect balance."),
+            (4, "Balance is too large."),
+            (5, "Balance is too large."),
+        ])
+
+
+@override_settings(ROOT_URLCONF=__name__, CARDS_INGEST_TOKEN="secret")
+class PostTransactionsViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        generate_cards(CardSeries.objects.create(description="series"), 2)
+        bulk_set_active(Card.objects.all(), True)
+        cls.card = Card.objects.order_by("pk").first()
+
+    def post(self, **extra):
+        lines = [
+            {"card": self.card.printable_number, "amount": "5"},
+            {"card": self.card.printable_number, "amount": "-10"},
+        ]
+        return self.client.post(
+            reverse("cards:post_transactions"),
+            "".join(json.dumps(line) + "\n" for line in lines),
+            content_type="application/x-ndjson",
+            **extra,
+        )
+
+    def test_token_required(self):
+        for extra in ({}, {"HTTP_AUTHORIZATION": "Bearer wrong"}):
+            with self.subTest(extra=extra):
+                self.assertEqual(self.post(**extra).status_code, 401)
+        self.assertFalse(self.card.transactions.exists())
+
+    @override_settings(CARDS_INGEST_TOKEN=None)
+    def test_disabled_without_token(self):
+        response = self.post(HTTP_AUTHORIZATION="Bearer None")
+        self.assertEqual(response.status_code, 401)
+
+    def test_results_streamed(self):
+        response = self.post(HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        lines = [json.loads(line) for line in
+                 b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([line.get("status") for line in lines[:2]],
+                         ["ok", "error"])
+        self.assertEqual(lines[2], {"posted": 1, "rejected": 1})
+
+
+@tag("benchmark")
+@override_settings(ROOT_URLCONF=__name__)
+class BenchmarkSuiteTests(TestCase):
+    """
+    Runs benchmarks on a small seed, so they keep working as views and
+    models change.
+    """
+    def setUp(self):
+        cache.clear()
+
+    def test_run_benchmark_suite(self):
+        seed_benchmark_data(2, 20, 1, seed=42)
+        results = run_benchmark_suite(samples=3, generate_count=5)
+        self.assertEqual(set(results), set(get_benchmark_scenarios(3, 5)))
+        for name, result in results.items():
+            with self.subTest(scenario=name):
+                self.assertGreater(result["calls"], 0)
+                self.assertLessEqual(result["p50_ms"], result["max_ms"])
+
+    def test_run_benchmark_suite_scenario(self):
+        seed_benchmark_data(1, 10, 0, seed=42)
+        results = run_benchmark_suite(samples=3, generate_count=5,
+                                      scenario="card_list")
+        self.assertEqual(
+            set(results), {"card_list_first_page", "card_list_deep_page"}
+        )
+
+    def test_benchmark_card_codec(self):
+        results = benchmark_card_codec(count=1000, series_count=5)
+        for name in ("encode_many", "decode_many"):
+            self.assertEqual(results[name]["numbers"], 1000)
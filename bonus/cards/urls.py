@@ -16,6 +16,8 @@ urlpatterns = [
         views.CardDetailView.as_view(),
         name="card_detail"
     ),
+    path("card/lookup/", views.card_lookup_view, name="card_lookup"),
+    path("card/balance/", views.card_balance_view, name="card_balance"),
     path(
         "card/<int:pk>/activate/", views.activate_card, name="activate_card"
     ),
@@ -39,11 +41,61 @@ urlpatterns = [
         views.GenerateCardsFormView.as_view(),
         name="generate_cards"
     ),
+    path(
+        "generation_job/<int:pk>/",
+        views.GenerationJobDetailView.as_view(),
+        name="generation_job_detail"
+    ),
+    path(
+        "generation_job/<int:pk>/progress/",
+        views.generation_job_progress,
+        name="generation_job_progress"
+    ),
     path(
         "create_series/",
         views.CardSeriesCreationFormView.as_view(),
         name="create_series"
     ),
     path("card_search/", views.card_search_view, name="card_search"),
+    path("bulk_action/", views.bulk_action_view, name="bulk_action"),
+    path(
+        "transactions/batch/",
+        views.post_transactions_view,
+        name="post_transactions"
+    ),
+    path(
+        "export/cards/",
+        views.export_view,
+        {"model_name": "cards"},
+        name="export_cards"
+    ),
+    path(
+        "export/transactions/",
+        views.export_view,
+        {"model_name": "transactions"},
+        name="export_transactions"
+    ),
+    path(
+        "api/card/balance/",
+        views.async_card_balance_view,
+        name="async_card_balance"
+    ),
+    path(
+        "api/card/<int:pk>/",
+        views.async_card_detail_view,
+        name="async_card_detail"
+    ),
+    path(
+        "api/card/<int:pk>/transactions/",
+        views.async_card_transactions_view,
+        name="async_card_transactions"
+    ),
+    path(
+        "analytics/transactions/",
+        views.transaction_analytics_view,
+        name="transaction_analytics"
+    ),
+    path("stats/queries/", views.query_stats_view, name="query_stats"),
+    path("stats/cache/", views.cache_stats_view, name="cache_stats"),
     path("", views.IndexView.as_view(), name="index"),
 ]
@@ -1,22 +1,197 @@
-from django.db.models import Max
+import resource
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass
+from itertools import islice
 
-from .models import Card
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
 
+from .cache import invalidate_cards
+from .codec import check_range, decode
+from .models import Card, CardSeries
+from .series_stats import apply_series_stats_deltas, get_status_deltas
 
-def get_next_card_number_in_series(card_series):
-    next_card_number = 1
-    if card_series.cards.count():
-        max_number_dict = card_series.cards.aggregate(max_number=Max("number"))
-        next_card_number = max_number_dict["max_number"] + 1
-    return next_card_number  # noqa
 
+@dataclass
+class GenerationStats:
+    first_number: int
+    last_number: int = 0
+    cards_created: int = 0
+    elapsed: float = 0.0
+    peak_rss_kb: int = 0
 
-def generate_cards(card_series, cards_count):
-    next_number = get_next_card_number_in_series(card_series)
-    cards = [
-        Card(
-            series=card_series,
-            number=(next_number + i),
-        ) for i in range(cards_count)
-    ]
-    Card.objects.bulk_create(cards)
+    @property
+    def cards_per_second(self):
+        if not self.elapsed:
+            return 0.0
+        return self.cards_created / self.elapsed
+
+
+@dataclass
+class SweepStats:
+    series_swept: int = 0
+    cards_updated: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self):
+        if not self.elapsed:
+            return 0.0
+        return self.cards_updated / self.elapsed
+
+
+def get_peak_rss_kb():
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        # macOS reports ru_maxrss in bytes, Linux in kilobytes
+        return peak_rss // 1024
+    return peak_rss
+
+
+def get_card_by_printable_number(printable_number):
+    series, number = decode(printable_number)
+    return Card.objects.select_related("series").get(
+        series_id=series, number=number
+    )
+
+
+def get_card_balance_queryset(printable_number):
+    """
+    Returns one-row queryset of card balance fields, without series join.
+
+    Raises ValueError on malformed printable number.
+    """
+    series, number = decode(printable_number)
+    return (Card.objects
+                .filter(series_id=series, number=number)
+                .values("pk", "series_id", "number", "balance", "status"))
+
+
+def search_cards(search_query_params):
+    search_query_params = {
+        key: value for key, value in search_query_params.items()
+        if value is not None
+    }
+    return Card.objects.filter(**search_query_params)
+
+
+def reserve_card_numbers(card_series, cards_count):
+    """
+    Atomically reserves `cards_count` numbers in series, returns the first.
+
+    The counter is bumped before it is read, so the row lock taken by the
+    UPDATE serializes concurrent generators on every backend. Raises
+    ValueError when numbers run out of printable range.
+    """
+    with transaction.atomic():
+        (CardSeries.objects
+                   .filter(pk=card_series.pk)
+                   .update(next_number=F("next_number") + cards_count))
+        next_number = (CardSeries.objects
+                                 .filter(pk=card_series.pk)
+                                 .values_list("next_number", flat=True)
+                                 .get())
+        # rolls the reservation back unless every number is printable
+        check_range(card_series.pk, next_number - 1)
+    return next_number - cards_count
+
+
+def iter_cards(card_series, first_number, cards_count):
+    for number in range(first_number, first_number + cards_count):
+        yield Card(series=card_series, number=number)
+
+
+def generate_cards(
+    card_series,
+    cards_count,
+    batch_size=None,
+    first_number=None,
+    progress_callback=None,
+):
+    """
+    Streams cards into the database in batches, one transaction per batch.
+
+    Every batch is reported to `progress_callback` with the current stats
+    inside the batch transaction, so progress persisted by the callback
+    never drifts from the committed cards and an interrupted run can be
+    resumed with `first_number=stats.last_number + 1` and the remaining
+    count.
+    """
+    if batch_size is None:
+        batch_size = settings.CARDS_GENERATION_BATCH_SIZE
+    if first_number is None:
+        first_number = reserve_card_numbers(card_series, cards_count)
+    # resumed runs pass numbers reserved before
+    check_range(card_series.pk, first_number + cards_count - 1)
+
+    stats = GenerationStats(first_number=first_number)
+    cards = iter_cards(card_series, first_number, cards_count)
+    started = time.perf_counter()
+
+    while batch := list(islice(cards, batch_size)):
+        with transaction.atomic():
+            Card.objects.bulk_create(batch)
+            apply_series_stats_deltas(
+                {card_series.pk: {"cards_count": len(batch)}}
+            )
+            stats.cards_created += len(batch)
+            stats.last_number = batch[-1].number
+            stats.elapsed = time.perf_counter() - started
+            stats.peak_rss_kb = get_peak_rss_kb()
+            if progress_callback is not None:
+                progress_callback(stats)
+
+    return stats
+
+
+def sweep_outdated_cards(batch_size=None, now=None, progress_callback=None):
+    """
+    Persists OUTDATED status for cards of expired series.
+
+    Cards are updated per series in batches of at most `batch_size` rows,
+    each in its own short transaction.
+    """
+    if batch_size is None:
+        batch_size = settings.CARDS_SWEEP_BATCH_SIZE
+    if now is None:
+        now = timezone.now()
+
+    stats = SweepStats()
+    expired_series_ids = (CardSeries.objects
+                                    .filter(valid_until__lte=now)
+                                    .order_by("id")
+                                    .values_list("pk", flat=True))
+    started = time.perf_counter()
+
+    for series_id in expired_series_ids.iterator():
+        pending_cards = (Card.objects
+                             .filter(series_id=series_id)
+                             .exclude(status=Card.OUTDATED)
+                             .order_by()
+                             .select_for_update()
+                             .values_list("pk", "status"))
+        while True:
+            with transaction.atomic():
+                statuses = dict(pending_cards[:batch_size])
+                if not statuses:
+                    break
+                stats.cards_updated += (Card.objects
+                                            .filter(pk__in=list(statuses))
+                                            .update(status=Card.OUTDATED))
+                invalidate_cards(statuses)
+                apply_series_stats_deltas(get_status_deltas(
+                    Counter((series_id, status)
+                            for status in statuses.values()),
+                    Card.OUTDATED,
+                ))
+            stats.elapsed = time.perf_counter() - started
+            if progress_callback is not None:
+                progress_callback(stats)
+        stats.series_swept += 1
+
+    stats.elapsed = time.perf_counter() - started
+    return stats
@@ -1,38 +1,84 @@
+import codecs
+import json
+
 from django.conf import settings
-from django.db.models import F
+from django.db import transaction
+from django.db.models import Sum
+from django.http import (Http404, HttpResponseBadRequest, JsonResponse,
+                         QueryDict, StreamingHttpResponse)
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse, reverse_lazy
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from django.views.generic import (DeleteView, DetailView, FormView, ListView,
                                   TemplateView)
 
-from .forms import CardGenerationForm, CardSearchForm, CardSeriesCreationForm
-from .models import Card, CardSeries
-from .utils import generate_cards
+from .bulk import bulk_delete, bulk_set_active, delete_cards_chunk
+from .cache import attach_card_series, cache_counters, get_card
+from .codec import encode_printable
+from .export import get_export_file_name, iter_export
+from .forms import (CardBulkActionForm, CardExportForm, CardGenerationForm,
+                    CardSearchForm, CardSeriesCreationForm,
+                    TransactionAnalyticsForm)
+from .ledger import ingest_transactions
+from .middleware import query_stats
+from .models import (ArchivedTransaction, Card, CardSeries, GenerationJob,
+                     RollupMark, SeriesStats, Transaction)
+from .pagination import (CURSOR_PARAMS, KeysetPaginationMixin,
+                         apaginate_keyset, get_canonical_query_string,
+                         get_cursor, paginate_keyset)
+from .rollups import TRANSACTION_ROLLUP, get_transaction_analytics
+from .series_stats import (SERIES_STATS_FIELDS, apply_series_stats_deltas,
+                           get_status_deltas)
+from .utils import (get_card_balance_queryset, get_card_by_printable_number,
+                    search_cards)
 
 
 class IndexView(TemplateView):
     template_name = "index.html"
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["totals"] = SeriesStats.objects.aggregate(
+            **{field_name: Sum(field_name)
+               for field_name in SERIES_STATS_FIELDS}
+        )
+        return context
+
 
 class CardSeriesListView(ListView):
     model = CardSeries
     template_name = "card_series_list.html"
 
+    def get_queryset(self):
+        return CardSeries.objects.select_related("stats")
+
 
-class CardListView(ListView):
+class CardListView(KeysetPaginationMixin, ListView):
     model = Card
     template_name = "card_list.html"
-    paginate_by = settings.CARDS_PER_PAGE_NUMBER
 
     def get_queryset(self):
-        return Card.objects.select_related("series").order_by("id").all()
+        return Card.objects.order_by("id").all()
+
+    def get_count_cache_key(self):
+        return "cards_count"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        attach_card_series(context["object_list"])
+        return context
 
 
 class CardDetailView(DetailView):
     template_name = "card_detail.html"
 
-    def get_queryset(self):
-        return Card.objects.select_related("series").all()
+    def get_object(self, queryset=None):
+        try:
+            return get_card(self.kwargs.get("pk"))
+        except Card.DoesNotExist:
+            raise Http404("Card not found.")
 
 
 class CardDeleteView(DeleteView):
@@ -40,27 +86,74 @@ class CardDeleteView(DeleteView):
     template_name = "card_confirm_delete.html"
     success_url = reverse_lazy("cards:index")
 
+    def form_valid(self, form):
+        # the card is locked and deleted with its transactions in one
+        # transaction, so none is posted to it in between
+        delete_cards_chunk((self.object.pk,))
+        return redirect(self.get_success_url())
+
 
-class CardTransactionListView(ListView):
+class CardTransactionListView(KeysetPaginationMixin, ListView):
     template_name = "card_transactions.html"
     context_object_name = "transaction_list"
+    descending = True
 
     def get_queryset(self):
-        card = get_object_or_404(Card, pk=self.kwargs.get("pk"))
-        return card.transactions.all()
+        self.card = get_object_or_404(Card, pk=self.kwargs.get("pk"))
+        return self.card.transactions.all()
+
+    def get_merged_querysets(self):
+        if self.request.GET.get("archived"):
+            return (self.card.archived_transactions.all(),)
+        return ()
+
+    def get_count_cache_key(self):
+        return f"card_transactions_count:{self.kwargs.get('pk')}"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["archived"] = bool(self.request.GET.get("archived"))
+        context["query_string"] = get_canonical_query_string(
+            self.request.GET
+        )
+        return context
 
 
 class GenerateCardsFormView(FormView):
     form_class = CardGenerationForm
     template_name = "generate_cards.html"
-    success_url = reverse_lazy("cards:card_list")
 
     def form_valid(self, form):
-        series = form.cleaned_data.get("series")
-        cards_count = form.cleaned_data.get("count")
-        generate_cards(card_series=series, cards_count=cards_count)
+        self.job = GenerationJob.objects.create(
+            series=form.cleaned_data.get("series"),
+            cards_count=form.cleaned_data.get("count"),
+        )
         return super().form_valid(form)
 
+    def get_success_url(self):
+        return reverse("cards:generation_job_detail", args=(self.job.pk,))
+
+
+class GenerationJobDetailView(DetailView):
+    template_name = "generation_job_detail.html"
+
+    def get_queryset(self):
+        return GenerationJob.objects.select_related("series").all()
+
+
+def generation_job_progress(request, pk):
+    job = get_object_or_404(GenerationJob, pk=pk)
+    return JsonResponse({
+        "id": job.pk,
+        "series": job.series_id,
+        "status": job.get_status_display(),
+        "cards_count": job.cards_count,
+        "cards_created": job.cards_created,
+        "progress": job.progress,
+        "first_number": job.first_number,
+        "error": job.error,
+    })
+
 
 class CardSeriesCreationFormView(FormView):
     form_class = CardSeriesCreationForm
@@ -73,38 +166,250 @@ class CardSeriesCreationFormView(FormView):
 
 
 def card_search_view(request):
-    form = CardSearchForm(request.POST or None)
+    form = CardSearchForm(request.GET or None)
     context = {
         "form": form,
         "object_list": None
     }
     if form.is_valid():
-        search_query_params = {
-            key: value for key, value in form.cleaned_data.items()
-            if value is not None
-        }
-        object_list = (Card.objects
-                           .annotate(
-                                valid_until_date=(
-                                    F("series__issue_date")
-                                    + F("series__duration")
-                                )
-                            )
-                           .filter(**search_query_params)
-                           .select_related("series"))
-        context["object_list"] = object_list
+        query_string = get_canonical_query_string(request.GET)
+        canonical_query = QueryDict(query_string, mutable=True)
+        for cursor_param in CURSOR_PARAMS:
+            if request.GET.get(cursor_param):
+                canonical_query[cursor_param] = request.GET[cursor_param]
+        if canonical_query.urlencode() != request.GET.urlencode():
+            return redirect(f"{request.path}?{canonical_query.urlencode()}")
+
+        page = paginate_keyset(
+            search_cards(form.cleaned_data),
+            page_size=settings.CARDS_PER_PAGE_NUMBER,
+            after=get_cursor(request, "after"),
+            before=get_cursor(request, "before"),
+        )
+        context["object_list"] = attach_card_series(page.object_list)
+        context["keyset_page"] = page
+        context["query_string"] = query_string
     return render(request, "card_search.html", context)
 
 
+def get_card_data(card):
+    return {
+        "id": card.pk,
+        "printable_number": card.printable_number,
+        "balance": card.balance,
+        "status": card.humanreadable_status,
+        "valid_until": card.valid_until,
+        "last_used_date": card.last_used_date,
+    }
+
+
+def get_card_balance_data(card):
+    return {
+        "id": card["pk"],
+        "printable_number": encode_printable(card["series_id"],
+                                             card["number"]),
+        "balance": card["balance"],
+        "status": Card.HUMANREADABLE_CARD_STATUSES.get(card["status"]),
+    }
+
+
+def card_lookup_view(request):
+    try:
+        card = get_card_by_printable_number(request.GET.get("number", ""))
+    except (ValueError, Card.DoesNotExist):
+        raise Http404("Card not found.")
+    return JsonResponse(get_card_data(card))
+
+
+def card_balance_view(request):
+    try:
+        card = get_card_balance_queryset(request.GET.get("number", "")).get()
+    except (ValueError, Card.DoesNotExist):
+        raise Http404("Card not found.")
+    return JsonResponse(get_card_balance_data(card))
+
+
+async def async_card_balance_view(request):
+    try:
+        card = await get_card_balance_queryset(
+            request.GET.get("number", "")
+        ).aget()
+    except (ValueError, Card.DoesNotExist):
+        raise Http404("Card not found.")
+    return JsonResponse(get_card_balance_data(card))
+
+
+async def async_card_detail_view(request, pk):
+    try:
+        card = await Card.objects.select_related("series").aget(pk=pk)
+    except Card.DoesNotExist:
+        raise Http404("Card not found.")
+    return JsonResponse(get_card_data(card))
+
+
+async def async_card_transactions_view(request, pk):
+    if not await Card.objects.filter(pk=pk).aexists():
+        raise Http404("Card not found.")
+    merged_querysets = ()
+    if request.GET.get("archived"):
+        merged_querysets = (ArchivedTransaction.objects.filter(card_id=pk),)
+    page = await apaginate_keyset(
+        Transaction.objects.filter(card_id=pk),
+        page_size=settings.CARDS_PER_PAGE_NUMBER,
+        after=get_cursor(request, "after"),
+        before=get_cursor(request, "before"),
+        descending=True,
+        merged_querysets=merged_querysets,
+    )
+    return JsonResponse({
+        "results": [
+            {
+                "id": card_transaction.pk,
+                "amount": card_transaction.amount,
+                "date_time": card_transaction.date_time,
+                "description": card_transaction.description,
+            }
+            for card_transaction in page.object_list
+        ],
+        "next_cursor": page.next_cursor,
+        "previous_cursor": page.previous_cursor,
+    })
+
+
+EXPORT_CONTENT_TYPES = {
+    CardExportForm.CSV: "text/csv",
+    CardExportForm.JSONL: "application/x-ndjson",
+}
+
+
+def export_view(request, model_name):
+    form = CardExportForm(request.GET)
+    if not form.is_valid():
+        return HttpResponseBadRequest(form.errors.as_json(),
+                                      content_type="application/json")
+    data_format = form.cleaned_data["data_format"]
+    compress = form.cleaned_data["compress"]
+    content_type = EXPORT_CONTENT_TYPES[data_format]
+    if compress:
+        content_type = "application/gzip"
+    response = StreamingHttpResponse(
+        iter_export(
+            model_name,
+            search_query_params=form.get_search_query_params(),
+            data_format=data_format,
+            compress=compress,
+        ),
+        content_type=content_type,
+    )
+    file_name = get_export_file_name(model_name, data_format, compress)
+    response["Content-Disposition"] = f'attachment; filename="{file_name}"'
+    return response
+
+
+def set_card_active(pk, is_active):
+    with transaction.atomic():
+        card = get_object_or_404(
+            Card.objects.select_for_update(of=("self",))
+                        .select_related("series"),
+            pk=pk,
+        )
+        old_status = card.status
+        card.is_active = is_active
+        card.status = card.actual_status
+        card.save(update_fields=("is_active", "status"))
+        apply_series_stats_deltas(get_status_deltas(
+            {(card.series_id, old_status): 1}, card.status
+        ))
+
+
 def activate_card(request, pk):
-    card = get_object_or_404(Card, pk=pk)
-    card.is_active = True
-    card.save()
+    set_card_active(pk, is_active=True)
     return redirect(reverse("cards:card_detail", args=(pk,)))
 
 
 def deactivate_card(request, pk):
-    card = get_object_or_404(Card, pk=pk)
-    card.is_active = False
-    card.save()
+    set_card_active(pk, is_active=False)
     return redirect(reverse("cards:card_detail", args=(pk,)))
+
+
+def is_ingest_authorized(request):
+    token = settings.CARDS_INGEST_TOKEN
+    return bool(token) and constant_time_compare(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    )
+
+
+def iter_ingest_lines(results):
+    posted = rejected = 0
+    for result in results:
+        if result["status"] == "ok":
+            posted += 1
+        else:
+            rejected += 1
+        yield json.dumps(result) + "\n"
+    yield json.dumps({"posted": posted, "rejected": rejected}) + "\n"
+
+
+# cross-site forms can not send the Authorization header, so the bearer
+# token also protects from request forgery
+@csrf_exempt
+@require_POST
+def post_transactions_view(request):
+    if not is_ingest_authorized(request):
+        response = JsonResponse({"error": "Authorization required."},
+                                status=401)
+        response["WWW-Authenticate"] = "Bearer"
+        return response
+    data_format = "jsonl"
+    if request.content_type == "text/csv":
+        data_format = "csv"
+    return StreamingHttpResponse(
+        iter_ingest_lines(ingest_transactions(
+            codecs.iterdecode(request, "utf-8"), data_format=data_format
+        )),
+        content_type="application/x-ndjson",
+    )
+
+
+def bulk_action_view(request):
+    form = CardBulkActionForm(request.POST or None)
+    context = {
+        "form": form,
+        "stats": None,
+    }
+    if form.is_valid():
+        cards = search_cards(form.get_search_query_params())
+        action = form.cleaned_data["action"]
+        if action == CardBulkActionForm.DELETE:
+            context["stats"] = bulk_delete(cards)
+        else:
+            context["stats"] = bulk_set_active(
+                cards, is_active=(action == CardBulkActionForm.ACTIVATE)
+            )
+        context["action"] = dict(CardBulkActionForm.BULK_ACTIONS)[action]
+    return render(request, "card_bulk_action.html", context)
+
+
+def transaction_analytics_view(request):
+    form = TransactionAnalyticsForm(request.GET)
+    context = {
+        "form": form,
+        "object_list": None,
+        "mark": None,
+    }
+    if form.is_valid():
+        context["object_list"] = get_transaction_analytics(
+            **form.get_analytics_params()
+        )
+        context["mark"] = (RollupMark.objects
+                                     .filter(name=TRANSACTION_ROLLUP)
+                                     .first())
+    return render(request, "transaction_analytics.html", context)
+
+
+def query_stats_view(request):
+    return JsonResponse(query_stats.snapshot())
+
+
+def cache_stats_view(request):
+    return JsonResponse(cache_counters.snapshot())